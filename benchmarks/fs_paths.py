@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Measures `FS.is_descendant_of` and `FS.get_relative_path` for deep trees
+against the implementations that walked the ancestors of the path.
+
+    $ python benchmarks/fs_paths.py [DEPTH...]
+
+The default depths are 3, 10 and 30.
+"""
+import functools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hyde.fs import File, Folder
+
+DEFAULT_DEPTHS = (3, 10, 30)
+ITERATIONS = 2000
+
+def ancestors_is_descendant_of(afile, ancestor):
+    stop = Folder(ancestor)
+    for folder in afile.ancestors():
+        if folder == stop:
+            return True
+        if stop.depth > folder.depth:
+            return False
+    return False
+
+def ancestors_get_relative_path(afile, root):
+    if afile.path == root:
+        return ''
+    ancestors = afile.ancestors(stop=root)
+    return functools.reduce(lambda f, p: Folder(p.name).child(f),
+                                        ancestors,
+                                        afile.name)
+
+def timed(function, *args):
+    started = time.time()
+    for _ in range(ITERATIONS):
+        result = function(*args)
+    return (time.time() - started) * 1e6 / ITERATIONS, result
+
+def measure(depth):
+    root = Folder(os.sep + os.path.join('site', 'content'))
+    path = root.child(os.path.join(*['level%d' % i for i in range(depth)]))
+    for name, old, new in (
+            ('is_descendant_of', ancestors_is_descendant_of,
+                lambda afile, root: afile.is_descendant_of(root)),
+            ('get_relative_path', ancestors_get_relative_path,
+                lambda afile, root: afile.get_relative_path(root))):
+        (old_time, old_result) = timed(lambda: old(File(path), root))
+        (new_time, new_result) = timed(lambda: new(File(path), root))
+        assert old_result == new_result
+        print "depth %3d %-18s %9.2f us -> %7.2f us (%5.1fx)" % (
+                    depth, name, old_time, new_time, old_time / new_time)
+
+def main(args):
+    for depth in [int(arg) for arg in args] or DEFAULT_DEPTHS:
+        measure(depth)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the lookups of nodes and resources by path.
+
+Builds a synthetic site in memory and times `resource_from_path`,
+`resource_from_relative_path`, `resource_from_relative_deploy_path`
+and `node_from_relative_path` for every resource.
+
+    $ python benchmarks/path_lookup.py [SIZE]
+
+The default size is 10000 resources.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hyde.fs import Folder
+from hyde.model import Config
+from hyde.site import Site
+
+RESOURCES_PER_NODE = 100
+
+def build_site(size):
+    """
+    Creates a site and adds `size` resources to it.
+    """
+    sitepath = Folder(tempfile.mkdtemp())
+    site = Site(sitepath, Config(sitepath, config_dict={}))
+    content = site.content.source_folder
+    for index in range(size):
+        folder = content.child_folder('section-%d/node-%d' % (
+                                    index // (RESOURCES_PER_NODE * 10),
+                                    index // RESOURCES_PER_NODE))
+        site.content.add_resource(folder.child('page-%d.html' % index))
+    sitepath.delete()
+    return site
+
+def measure(name, lookup, paths):
+    started = time.time()
+    for path in paths:
+        assert lookup(path)
+    elapsed = time.time() - started
+    print "%-36s %8.2f us/lookup" % (name, elapsed * 1e6 / len(paths))
+
+def main(args):
+    size = int(args[0]) if args else 10000
+    site = build_site(size)
+    resources = list(site.content.walk_resources())
+    relative_paths = [resource.relative_path.replace(os.sep, '/')
+                        for resource in resources]
+    paths = [resource.path for resource in resources]
+    node_paths = [resource.node.relative_path.replace(os.sep, '/')
+                        for resource in resources]
+    content = site.content
+    measure('resource_from_path', content.resource_from_path, paths)
+    measure('resource_from_relative_path',
+                content.resource_from_relative_path, relative_paths)
+    measure('resource_from_relative_deploy_path',
+                content.resource_from_relative_deploy_path, relative_paths)
+    measure('node_from_relative_path',
+                content.node_from_relative_path, node_paths)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the overhead of raising the events of a text resource in
+15 plugins, of which only a few implement the resource events, with
+the plugin proxy against the proxy that looked up every plugin on
+every call.
+
+    $ python benchmarks/plugin_events.py [RESOURCES]
+
+The default is 10000 resources.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hyde.fs import Folder
+from hyde.model import Config
+from hyde.plugin import Plugin, PluginProxy
+from hyde.profiler import Profiler
+from hyde.site import Site
+
+DEFAULT_RESOURCES = 10000
+PLUGINS = 15
+TEXT_PLUGINS = 3
+EVENTS = ('begin_text_resource', 'text_resource_complete')
+
+class SitePlugin(Plugin):
+
+    def begin_site(self):
+        pass
+
+class TextPlugin(Plugin):
+
+    def begin_text_resource(self, resource, text):
+        return text
+
+    def text_resource_complete(self, resource, text):
+        return text
+
+class LookupPluginProxy(object):
+    """
+    The proxy that looked up the plugins on every call.
+    """
+
+    def __init__(self, site, profiler=None):
+        self.site = site
+        self.profiler = profiler or Profiler()
+
+    def __getattr__(self, method_name):
+        def __call_plugins__(*args):
+            res = None
+            if self.site.plugins:
+                for plugin in self.site.plugins:
+                    if hasattr(plugin, method_name):
+                        checker = getattr(plugin, 'should_call__' + method_name)
+                        if checker(*args):
+                            function = getattr(plugin, method_name)
+                            with self.profiler.measure('plugin',
+                                    '%s.%s' % (plugin.__class__.__name__,
+                                                method_name)):
+                                res = function(*args)
+                            targs = list(args)
+                            if len(targs):
+                                last = targs.pop()
+                                res = res if res else last
+                                targs.append(res)
+                                args = tuple(targs)
+            return res
+        return __call_plugins__
+
+def build_site():
+    sitepath = Folder(tempfile.mkdtemp())
+    site = Site(sitepath, Config(sitepath, config_dict={}))
+    site.plugins = ([TextPlugin(site) for _ in range(TEXT_PLUGINS)] +
+                    [SitePlugin(site)
+                        for _ in range(PLUGINS - TEXT_PLUGINS)])
+    resource = site.content.add_resource(
+                    site.content.source_folder.child('page.html'))
+    sitepath.delete()
+    return (site, resource)
+
+def timed(proxy, resource, count):
+    started = time.time()
+    for _ in range(count):
+        for event in EVENTS:
+            getattr(proxy, event)(resource, u'text')
+    return (time.time() - started) * 1e6 / count
+
+def main(args):
+    count = int(args[0]) if args else DEFAULT_RESOURCES
+    (site, resource) = build_site()
+    old = timed(LookupPluginProxy(site), resource, count)
+    new = timed(PluginProxy(site), resource, count)
+    print "%d plugins, %d resources: %9.2f us -> %7.2f us per resource" \
+          " (%5.1fx)" % (PLUGINS, count, old, new, old / new)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
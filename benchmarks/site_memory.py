@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the memory used by the site model of large sites.
+
+Builds the nodes, resources and metadata of a synthetic site with the
+given number of resources, without touching the disk, and reports the
+growth of the resident set size. Every size is measured in a fresh
+process.
+
+    $ python benchmarks/site_memory.py [SIZE...]
+
+The default sizes are 10000, 100000 and 500000 resources.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hyde.ext.plugins.meta import Metadata
+from hyde.fs import Folder
+from hyde.model import Config
+from hyde.site import Site
+
+DEFAULT_SIZES = (10000, 100000, 500000)
+RESOURCES_PER_NODE = 100
+NODES_PER_SECTION = 50
+
+def max_rss():
+    """
+    Returns the peak resident set size of this process in bytes.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+def build_site(size):
+    """
+    Creates a site and adds `size` resources with metadata to it.
+    """
+    sitepath = Folder(tempfile.mkdtemp())
+    site = Site(sitepath, Config(sitepath, config_dict={}))
+    site.meta = Metadata(dict(author='hyde', layout='post.j2',
+                              tags=['one', 'two']))
+    content = site.content.source_folder
+    for index in range(size):
+        node_index = index // RESOURCES_PER_NODE
+        folder = content.child_folder('section-%d/node-%d' %
+                        (node_index // NODES_PER_SECTION, node_index))
+        res = site.content.add_resource(
+                        folder.child('page-%d.html' % index))
+        node = res.node
+        if not hasattr(node, 'meta'):
+            node.meta = Metadata(dict(section=node.parent.name),
+                                 node.parent.meta
+                                    if hasattr(node.parent, 'meta')
+                                    else site.meta)
+        res.meta = Metadata(dict(title='Page %d' % index), node.meta)
+        res.relative_path
+    sitepath.delete()
+    return site
+
+def measure(size):
+    before = max_rss()
+    started = time.time()
+    site = build_site(size)
+    elapsed = time.time() - started
+    growth = max_rss() - before
+    print "%8d resources %10.1f MB %8d bytes/resource %8.1fs" % (
+                size, growth / 1024.0 / 1024.0,
+                growth // size, elapsed)
+    return site
+
+def main(args):
+    if args[:1] == ['--child']:
+        measure(int(args[1]))
+        return
+    sizes = [int(arg) for arg in args] or DEFAULT_SIZES
+    for size in sizes:
+        subprocess.check_call([sys.executable, os.path.abspath(__file__),
+                                '--child', str(size)])
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
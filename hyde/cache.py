@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Caches that persist between generations.
+"""
+import os
+from collections import OrderedDict
+
+from hyde.fs import File, Folder
+
+from hyde.util import getLoggerWithNullHandler
+logger = getLoggerWithNullHandler('hyde.engine')
+
+
+class RenderCache(object):
+    """
+    A content addressed store for rendered output. The caller computes
+    a key from everything that affects the output of a resource and
+    the cache maps the key to the output.
+    """
+
+    def __init__(self, sitepath, cache_folder_name='.hyde_cache'):
+        super(RenderCache, self).__init__()
+        self.root = Folder(sitepath).child_folder(
+                        cache_folder_name).child_folder('render')
+        self.hits = 0
+        self.misses = 0
+
+    def __file_for_key__(self, key):
+        return File(self.root.child_folder(key[:2]).child(key))
+
+    def get(self, key):
+        """
+        Returns the cached output for the given key or None if
+        nothing has been cached for it.
+        """
+        cached = self.__file_for_key__(key)
+        if not cached.exists:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.debug("Render cache hit [%s]" % key)
+        return cached.read_all()
+
+    def put(self, key, text):
+        """
+        Stores the given output under the given key. The output is
+        written to a temporary file and renamed so that concurrent
+        generations never see a partial entry.
+        """
+        cached = self.__file_for_key__(key)
+        cached.parent.make()
+        temp = File(cached.path + '.%d.tmp' % os.getpid())
+        temp.write(text)
+        os.rename(temp.path, cached.path)
+
+    def clear(self):
+        """
+        Removes all cached output.
+        """
+        self.root.delete()
+
+
+class SourceCache(object):
+    """
+    Keeps the decoded text of recently read source files in memory so
+    that the plugins, the generator and the template loader read each
+    file from disk only once per generation. An entry is reused only
+    while the size and modification time of its file are unchanged.
+    The least recently used entries are evicted when the cached text
+    exceeds `budget` characters.
+    """
+
+    def __init__(self, budget=64 * 1024 * 1024):
+        super(SourceCache, self).__init__()
+        self.budget = budget
+        self.clear()
+
+    def clear(self):
+        """
+        Discards all the cached text and resets the statistics.
+        """
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, afile):
+        """
+        Returns the text of the given file, from memory if possible.
+        """
+        path = afile.path
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime)
+        entry = self.entries.pop(path, None)
+        if entry:
+            self.size -= len(entry[1])
+            if entry[0] == key:
+                self.hits += 1
+                self.__store__(path, entry)
+                return entry[1]
+        self.misses += 1
+        text = afile.read_all()
+        self.__store__(path, (key, text))
+        return text
+
+    def __store__(self, path, entry):
+        if len(entry[1]) > self.budget:
+            return
+        self.entries[path] = entry
+        self.size += len(entry[1])
+        while self.size > self.budget:
+            (_, evicted) = self.entries.popitem(last=False)
+            self.size -= len(evicted[1])
@@ -7,6 +7,7 @@ from hyde.exceptions import HydeException
 from hyde.fs import FS, File, Folder
 from hyde.layout import Layout, HYDE_DATA
 from hyde.model import Config
+from hyde.shard import parse_shard
 from hyde.site import Site
 from hyde.version import __version__
 from hyde.util import getLoggerWithConsoleHandler
@@ -101,23 +102,153 @@ class Engine(Application):
                         help='Where should the site be generated?')
     @true('-r', '--regen', dest='regen', default=False,
                         help='Only process changed files')
+    @store('-j', '--jobs', type=int, dest='jobs', default=1,
+                        help='Number of processes used to render the site')
+    @store('--writers', type=int, dest='writers', default=0, metavar='N',
+                        help='Number of threads that write the outputs while'
+                             ' the next resources are rendered')
+    @store('--change-detection', dest='change_detection', default=None,
+                        choices=('mtime', 'hash'),
+                        help='Detect changed files by modification time'
+                             ' (default) or by content hash')
+    @store('--changed-list', dest='changed_list', default=None,
+                        metavar='PATH',
+                        help='Write the deploy paths of the outputs that'
+                             ' changed to the given file')
+    @store('--shard', dest='shard', default=None, metavar='K/N',
+                        help='Generate only the K-th of N deterministic'
+                             ' slices of the resources')
+    @append('--only', dest='only', default=None, metavar='GLOB',
+                        help='Generate only the resources matching the'
+                             ' glob and the resources that depend on them.'
+                             ' Can be given more than once')
+    @true('--plan', dest='plan', default=False,
+                        help='List the resources an incremental generation'
+                             ' would regenerate and why, without'
+                             ' generating anything')
+    @store('--profile', dest='profile', default=None, metavar='PATH',
+                        help='Measure where the generation spends its time'
+                             ' and write the report to the given file')
+    @store('--profile-top', type=int, dest='profile_top', default=10,
+                        metavar='N',
+                        help='Number of entries per category in the'
+                             ' profile summary')
     def gen(self, args):
         """
         The generate command. Generates the site at the given
         deployment directory.
         """
         sitepath = self.main(args)
+        shard = parse_shard(args.shard) if args.shard else None
+        if shard and args.only:
+            raise HydeException("--only cannot be combined with --shard.")
         site = self.make_site(sitepath, args.config, args.deploy)
+        if args.change_detection:
+            site.config.change_detection = args.change_detection
         from hyde.generator import Generator
         gen = Generator(site)
+        gen.profiler.enabled = bool(args.profile)
+        gen.writer.threads = args.writers
+        if args.plan:
+            return self.plan(gen)
         incremental = True
         if args.regen:
             logger.info("Regenerating the site...")
             incremental = False
 
-        gen.generate_all(incremental=incremental)
+        if args.only:
+            gen.generate_only(args.only)
+        else:
+            gen.generate_all(incremental=incremental, jobs=args.jobs,
+                                shard=shard)
+        if args.changed_list:
+            changed = sorted(gen.changed_outputs)
+            File(args.changed_list).write(
+                    u''.join(path + u'\n' for path in changed))
+        if args.profile:
+            gen.profiler.save(args.profile)
+            for line in gen.profiler.summary(args.profile_top):
+                logger.info(line)
+            logger.info("Profile written to [%s]" % args.profile)
         logger.info("Generation complete.")
 
+    def plan(self, gen):
+        """
+        Reports the resources an incremental generation would regenerate
+        with the reason for each and a summary by reason.
+        """
+        plan = gen.plan()
+        reasons = {}
+        for resource, reason in plan:
+            logger.info("%s: %s" % (resource.relative_path, reason))
+            kind = reason.split(':')[0]
+            reasons[kind] = reasons.get(kind, 0) + 1
+        total = len([resource
+                        for resource in gen.site.content.walk_resources()
+                            if resource.is_processable])
+        logger.info("[%d] of [%d] resources would be regenerated" %
+                        (len(plan), total))
+        for kind, count in sorted(reasons.iteritems(),
+                                    key=lambda item: item[1], reverse=True):
+            logger.info("  [%d] %s" % (count, kind))
+        return plan
+
+    @subcommand('merge-shards',
+                help='Combine the output of sharded generations')
+    @store('-c', '--config-path', default='site.yaml', dest='config',
+            help='The configuration used to generate the site')
+    @store('-d', '--deploy-path', dest='deploy', default=None,
+                        help='Where should the site be generated?')
+    @param('folders', nargs='+', metavar='FOLDER',
+            help='Deploy folders of the shards')
+    def merge_shards(self, args):
+        """
+        The merge-shards command. Copies the outputs of all the shards
+        into the deploy folder and merges their dependency data into
+        the site.
+        """
+        sitepath = self.main(args)
+        site = self.make_site(sitepath, args.config, args.deploy)
+        from hyde.model import Dependents, Manifest, Outputs
+        from hyde.shard import merge_shards
+        deps = Dependents(sitepath, store=site.config.store)
+        manifest = Manifest(sitepath, store=site.config.store)
+        outputs = Outputs(sitepath, store=site.config.store)
+        merge_shards(site, args.folders, deps, manifest, outputs)
+        deps.save()
+        manifest.save()
+        outputs.save()
+        logger.info("Merge complete.")
+
+    @subcommand('deps', help='Query the dependency graph of the site')
+    @store('-c', '--config-path', default='site.yaml', dest='config',
+            help='The configuration used to generate the site')
+    @store('--deps', dest='deps', default=None, metavar='PATH',
+            help='List everything the given path depends on')
+    @store('--rdeps', dest='rdeps', default=None, metavar='PATH',
+            help='List everything that depends on the given path')
+    def deps(self, args):
+        """
+        The deps command. Queries the dependency graph recorded by the
+        last generation. Paths may be given relative to the site, the
+        content folder or the layout folder.
+        """
+        sitepath = self.main(args)
+        if not (args.deps or args.rdeps):
+            raise HydeException("Either --deps or --rdeps is required.")
+        site = self.make_site(sitepath, args.config)
+        from hyde.model import Dependents
+        graph = Dependents(sitepath, store=site.config.store)
+        if args.deps:
+            result = graph.dependencies_of(
+                        self.dependency_path(site, args.deps))
+        else:
+            result = graph.dependents_of(
+                        self.dependency_path(site, args.rdeps))
+        for path in sorted(result):
+            logger.info(path)
+        return result
+
     @subcommand('serve', help='Serve the website')
     @store('-a', '--address', default='localhost', dest='address',
             help='The address where the website must be served from.')
@@ -169,6 +300,18 @@ class Engine(Application):
 
 
 
+    def dependency_path(self, site, path):
+        """
+        Converts the given path to the form used in the dependency
+        graph: relative to the content or the layout folder.
+        """
+        path = path.replace(os.sep, '/')
+        for root in (site.config.layout_root, site.config.content_root):
+            prefix = root.replace(os.sep, '/').rstrip('/') + '/'
+            if path.startswith(prefix):
+                return path[len(prefix):]
+        return path
+
     def make_site(self, sitepath, config, deploy=None):
         """
         Creates a site object from the given sitepath and the config file.
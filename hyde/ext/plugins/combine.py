@@ -129,6 +129,6 @@ class CombinePlugin(Plugin):
             "Combining %d resources for [%s]" % (len(resources),
                                                  resource))
         if where == "top":
-            return "".join([r.source.read_all() for r in resources] + [text])
+            return "".join([r.source_text for r in resources] + [text])
         else:
-            return "".join([text] + [r.source.read_all() for r in resources])
\ No newline at end of file
+            return "".join([text] + [r.source_text for r in resources])
\ No newline at end of file
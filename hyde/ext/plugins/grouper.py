@@ -206,8 +206,8 @@ class GrouperPlugin(Plugin):
             grouping.name = name
             prev_att = 'prev_in_%s' % name
             next_att = 'next_in_%s' % name
-            setattr(Resource, prev_att, None)
-            setattr(Resource, next_att, None)
+            Resource.register_attribute(prev_att)
+            Resource.register_attribute(next_att)
             self.site.grouper[name] = Group(grouping)
             walker = Group.walk_resources(
                             self.site.content, self.site.grouper[name])
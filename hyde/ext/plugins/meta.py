@@ -7,20 +7,57 @@ from hyde.model import Expando
 from hyde.plugin import Plugin
 import yaml
 
+YAML_FINDER = re.compile(
+            r"^\s*(?:---|===)\s*\n((?:.|\n)+?)\n\s*(?:---|===)\s*\n*",
+            re.MULTILINE)
+
 
 class Metadata(Expando):
     """
     Container class for yaml meta data.
+
+    Values that are not set on the metadata itself are looked up in the
+    parent metadata, so that nodes and resources do not carry a copy of
+    everything they inherit.
     """
 
-    def __init__(self, data, parent=None):
+    __slots__ = ('_parent',)
 
+    def __init__(self, data, parent=None):
+        self._parent = parent
         super(Metadata, self).__init__({})
-        if parent:
-            self.update(parent.__dict__)
         if data:
             self.update(data)
 
+    def __getattr__(self, name):
+        if name.startswith('__') or name == '_parent' or not self._parent:
+            raise AttributeError(name)
+        return getattr(self._parent, name)
+
+    def __iter__(self):
+        items = dict(self._parent) if self._parent else {}
+        items.update(self.__dict__)
+        return items.iteritems()
+
+    def get(self, key, default=None):
+        """
+        Dict like get helper method
+        """
+        if key in self.__dict__:
+            return self.__dict__[key]
+        if self._parent:
+            return self._parent.get(key, default)
+        return default
+
+    def to_dict(self):
+        """
+        Reverse transform the metadata, including the inherited
+        values, to dict
+        """
+        result = self._parent.to_dict() if self._parent else {}
+        result.update(super(Metadata, self).to_dict())
+        return result
+
     def update(self, data):
         """
         Updates the metadata with new stuff
@@ -67,8 +104,39 @@ class MetaPlugin(Plugin):
             for resource in node.resources:
                 if not hasattr(resource, 'meta'):
                     resource.meta = Metadata({}, node.meta)
-                if resource.source_file.is_text and not resource.simple_copy:
-                    self.__read_resource__(resource, resource.source_file.read_all())
+                if resource.is_text and not resource.simple_copy:
+                    self.__load_resource__(resource)
+        if self.site.snapshot is not None:
+            self.site.snapshot.prune('frontmatter')
+
+    def __load_resource__(self, resource):
+        """
+        Loads the metadata of the resource when the site begins. With
+        a site snapshot, the source is only read and parsed if it has
+        changed since the snapshot was taken.
+        """
+        snapshot = self.site.snapshot
+        if snapshot is None:
+            self.__read_resource__(resource, resource.source_text)
+            return
+
+        def read():
+            (data, _) = self.__split_metadata__(resource.source_text)
+            return yaml.load(data) if data else {}
+
+        self.logger.debug("Loading metadata of resource [%s]" % resource)
+        self.__assign_metadata__(resource,
+                    snapshot.frontmatter(resource.path, read))
+
+    def __split_metadata__(self, text):
+        """
+        Splits the text into the meta data (None if there is no
+        meta area) and the text that follows it.
+        """
+        match = re.match(YAML_FINDER, text)
+        if not match:
+            return (None, text)
+        return (match.group(1), text[match.end():])
 
     def __read_resource__(self, resource, text):
         """
@@ -77,17 +145,18 @@ class MetaPlugin(Plugin):
         Once loaded, remove the meta area from the text.
         """
         self.logger.debug("Trying to load metadata from resource [%s]" % resource)
-        yaml_finder = re.compile(
-                    r"^\s*(?:---|===)\s*\n((?:.|\n)+?)\n\s*(?:---|===)\s*\n*",
-                    re.MULTILINE)
-        match = re.match(yaml_finder, text)
-        if not match:
+        (data, text) = self.__split_metadata__(text)
+        if data is None:
             self.logger.debug("No metadata found in resource [%s]" % resource)
             data = {}
-        else:
-            text = text[match.end():]
-            data = match.group(1)
+        self.__assign_metadata__(resource, data)
+        return text or ' '
 
+    def __assign_metadata__(self, resource, data):
+        """
+        Assigns the given meta data, a dictionary or yaml text,
+        to the resource.
+        """
         if not hasattr(resource, 'meta') or not resource.meta:
             if not hasattr(resource.node, 'meta'):
                 resource.node.meta = Metadata({})
@@ -97,7 +166,6 @@ class MetaPlugin(Plugin):
         self.__update_standard_attributes__(resource)
         self.logger.debug("Successfully loaded metadata from resource [%s]"
                         % resource)
-        return text or ' '
 
     def __update_standard_attributes__(self, obj):
         """
@@ -119,8 +119,8 @@ class SorterPlugin(Plugin):
             prev_att = 'prev_by_%s' % name
             next_att = 'next_by_%s' % name
 
-            setattr(Resource, prev_att, None)
-            setattr(Resource, next_att, None)
+            Resource.register_attribute(prev_att)
+            Resource.register_attribute(next_att)
 
             walker = getattr(self.site.content,
                                 sort_method_name,
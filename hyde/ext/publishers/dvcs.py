@@ -14,11 +14,18 @@ from subprocess import Popen, PIPE
 class DVCS(Publisher):
     __metaclass__ = abc.ABCMeta
 
+    # Names in the repository that are never copied or deleted: the
+    # metadata folders of the version control systems.
+    ignore = ['.git', '.hg', '.bzr', '.svn', '_darcs', 'CVS']
+
     def initialize(self, settings):
         self.settings = settings
         self.path = self.site.sitepath.child_folder(settings.path)
         self.url = settings.url
         self.branch = getattr(settings, 'branch', 'master')
+        self.compare = getattr(settings, 'compare', 'mtime')
+        self.delete = getattr(settings, 'delete', False)
+        self.threads = getattr(settings, 'threads', 0)
         self.switch(self.branch)
 
     @abc.abstractmethod
@@ -44,9 +51,18 @@ class DVCS(Publisher):
         super(DVCS, self).publish()
         if not self.path.exists:
             raise Exception("The destination repository must exist.")
-        self.site.config.deploy_root_path.copy_contents_to(self.path)
-        self.add()
-        self.commit(self.message)
+        changes = self.site.config.deploy_root_path.mirror_to(self.path,
+                            compare=self.compare,
+                            delete=self.delete,
+                            threads=self.threads,
+                            ignore=self.ignore)
+        if changes:
+            self.logger.info("Publishing [%d] changes" % len(changes))
+            self.add()
+            self.commit(self.message)
+        else:
+            # Push anyway, in case an earlier commit was never pushed.
+            self.logger.info("The repository is up to date.")
         self.push()
 
 
@@ -56,7 +56,8 @@ class PyFS(Publisher):
 
     def publish(self):
         super(PyFS, self).publish()
-        deploy_fs = OSFS(self.site.config.deploy_root_path.path)
+        deploy_root = self.site.config.deploy_root_path
+        deploy_fs = OSFS(deploy_root.path)
         for (dirnm,local_filenms) in deploy_fs.walk():
             logger.info("Making directory: %s",dirnm)
             self.fs.makedir(dirnm,allow_recreate=True)
@@ -64,6 +65,7 @@ class PyFS(Publisher):
             #  Process each local file, to see if it needs updating.
             for filenm in local_filenms:
                 filepath = pathjoin(dirnm,filenm)
+                local_file = File(deploy_root.child(filepath.lstrip('/')))
                 #  Try to find an existing remote file, to compare metadata.
                 for (nm,info) in remote_fileinfos:
                     if nm == filenm:
@@ -72,14 +74,13 @@ class PyFS(Publisher):
                     info = {}
                 #  Skip it if the etags match
                 if self.check_etag and "etag" in info:
-                    with deploy_fs.open(filepath,"rb") as f:
-                        local_etag = self._calculate_etag(f)
+                    local_etag = self._calculate_etag(local_file)
                     if info["etag"] == local_etag:
                         logger.info("Skipping file [etag]: %s",filepath)
                         continue
                 #  Skip it if the mtime is more recent remotely.
                 if self.check_mtime and "modified_time" in info:
-                    local_mtime = deploy_fs.getinfo(filepath)["modified_time"]
+                    local_mtime = local_file.last_modified
                     if info["modified_time"] > local_mtime:
                         logger.info("Skipping file [mtime]: %s",filepath)
                         continue
@@ -94,11 +95,9 @@ class PyFS(Publisher):
                     logger.info("Removing file: %s",filepath)
                     self.fs.remove(filepath)
 
-    def _calculate_etag(self,f):
+    def _calculate_etag(self,local_file):
         hasher = getattr(hashlib,self.check_etag.lower())()
-        data = f.read(1024*64)
-        while data:
-            hasher.update(data)
-            data = f.read(1024*64)
+        for chunk in local_file.iter_chunks():
+            hasher.update(chunk)
         return hasher.hexdigest()
 
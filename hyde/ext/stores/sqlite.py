@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Contains a store that keeps the data hyde needs between generations in
+a SQLite database.
+
+The namespaces share a single database file (`.hyde_store.sqlite`) in
+the site folder. Only the entries that have changed are written and
+every write happens in an immediate transaction, so concurrent
+generations of the same site wait for each other instead of
+overwriting each other's changes.
+
+To use it, add the following to the site configuration:
+
+    store: sqlite
+"""
+import json
+import sqlite3
+
+from hyde.fs import File
+from hyde.store import Store
+
+from hyde.util import getLoggerWithNullHandler
+logger = getLoggerWithNullHandler('hyde.engine')
+
+DATABASE_FILE_NAME = '.hyde_store.sqlite'
+
+class SQLiteStore(Store):
+    """
+    Stores the namespaces as rows of a SQLite table.
+    """
+
+    timeout = 60
+
+    def __init__(self, sitepath, namespace, file_name):
+        super(SQLiteStore, self).__init__(sitepath, namespace, file_name)
+        self.database = File(self.sitepath.child(DATABASE_FILE_NAME))
+
+    def connect(self):
+        """
+        Opens a connection to the database and creates the table
+        if it does not exist. Connections are not kept open so that
+        the store survives a fork.
+        """
+        connection = sqlite3.connect(self.database.path,
+                                timeout=self.timeout,
+                                isolation_level=None)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "namespace TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))")
+        return connection
+
+    def load(self):
+        if not self.database.exists:
+            return {}
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                    "SELECT key, value FROM entries WHERE namespace = ?",
+                    (self.namespace,))
+            return dict((key, json.loads(value)) for key, value in rows)
+        finally:
+            connection.close()
+
+    def save(self, data, changed, removed):
+        if not (changed or removed):
+            return
+        if not self.database.parent.exists:
+            return
+        connection = self.connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value)"
+                    " VALUES (?, ?, ?)",
+                    ((self.namespace, key, json.dumps(data[key]))
+                        for key in changed if key in data))
+                connection.executemany(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                    ((self.namespace, key) for key in removed
+                        if key not in data))
+            except:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            logger.debug("Saved [%d] changed and [%d] removed entries"
+                            " in [%s]" % (len(changed), len(removed),
+                                            self.namespace))
+        finally:
+            connection.close()
@@ -591,14 +591,27 @@ class HydeLoader(FileSystemLoader):
         #
         template = template.replace(os.sep, '/')
         logger.debug("Loading template [%s] and preprocessing" % template)
-        (contents,
-            filename,
-                date) = super(HydeLoader, self).get_source(
-                                        environment, template)
-        if self.preprocessor:
+        resource = None
+        if hasattr(self.site, 'content'):
             resource = self.site.content.resource_from_relative_path(template)
-            if resource:
-                contents = self.preprocessor(resource, contents) or contents
+        if resource:
+            # Content resources are read through the source cache of
+            # the site instead of from the disk again.
+            filename = resource.path
+            mtime = os.path.getmtime(filename)
+            contents = resource.source_text
+            def date():
+                try:
+                    return os.path.getmtime(filename) == mtime
+                except OSError:
+                    return False
+        else:
+            (contents,
+                filename,
+                    date) = super(HydeLoader, self).get_source(
+                                            environment, template)
+        if self.preprocessor and resource:
+            contents = self.preprocessor(resource, contents) or contents
         return (contents, filename, date)
 
 
@@ -621,6 +634,7 @@ class Jinja2Template(Template):
                             if hasattr(engine, 'preprocessor') else None)
 
         self.loader = HydeLoader(self.sitepath, site, self.preprocessor)
+        self.dependencies = {}
 
         default_extensions = [
                 IncludeText,
@@ -704,15 +718,41 @@ class Jinja2Template(Template):
         """
         Clear all caches to prepare for regeneration
         """
+        self.dependencies = {}
         if self.env.bytecode_cache:
             self.env.bytecode_cache.clear()
 
+    def use_private_caches(self):
+        """
+        The bytecode cache is shared on disk and is not safe to
+        write from many processes. Worker processes compile the
+        templates in memory instead.
+        """
+        self.env.bytecode_cache = None
 
-    def get_dependencies(self, path):
+    def __template_mtime__(self, path):
         """
-        Finds dependencies hierarchically based on the included
-        files.
+        Returns the modification time of the file the loader would
+        load for the given template or None if there is no such file.
+        """
+        pieces = path.strip().replace(os.sep, '/').split('/')
+        for searchpath in self.loader.searchpath:
+            filename = os.path.join(searchpath, *pieces)
+            if os.path.isfile(filename):
+                return os.path.getmtime(filename)
+        return None
+
+    def __referenced_templates__(self, path):
+        """
+        Returns the templates the given template includes, imports or
+        extends directly. The result is memoized until the template
+        file changes, so shared layouts are parsed only once.
         """
+        mtime = self.__template_mtime__(path)
+        if mtime is not None and path in self.dependencies:
+            (memo_mtime, tpls) = self.dependencies[path]
+            if memo_mtime == mtime:
+                return tpls
         text = self.env.loader.get_source(self.env, path)[0]
         from jinja2.meta import find_referenced_templates
         try:
@@ -720,13 +760,31 @@ class Jinja2Template(Template):
         except:
             logger.error("Error parsing[%s]" % path)
             raise
-        tpls = find_referenced_templates(ast)
-        deps = list(self.env.globals['deps'].get('path', []))
-        for dep in tpls:
-            deps.append(dep)
-            if dep:
-                deps.extend(self.get_dependencies(dep))
-        return list(set(deps))
+        tpls = list(find_referenced_templates(ast))
+        if mtime is not None:
+            self.dependencies[path] = (mtime, tpls)
+        return tpls
+
+    def get_dependencies(self, path):
+        """
+        Finds dependencies hierarchically based on the included
+        files. Only the templates referenced directly by each template
+        are memoized, so a change in a nested template is seen by all
+        the templates that include it.
+        """
+        deps = set(self.env.globals['deps'].get('path', []))
+        visited = set()
+        pending = [path]
+        while pending:
+            current = pending.pop()
+            if current in visited:
+                continue
+            visited.add(current)
+            for dep in self.__referenced_templates__(current):
+                deps.add(dep)
+                if dep:
+                    pending.append(dep)
+        return list(deps)
 
     @property
     def exception_class(self):
@@ -7,13 +7,27 @@ for common operations to provide a single interface.
 """
 
 import codecs
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import hashlib
 import mimetypes
+import mmap
 import os
 import shutil
 from distutils import dir_util
 import functools
 import fnmatch
+import re
+import time
+from multiprocessing.pool import ThreadPool
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
 
 from hyde.util import getLoggerWithNullHandler
 
@@ -21,6 +35,23 @@ logger = getLoggerWithNullHandler('fs')
 
 # pylint: disable-msg=E0611
 
+_compiled_globs = {}
+
+def compile_globs(patterns):
+    """
+    Compiles the given glob patterns into a single regular expression
+    that matches what `fnmatch` matches for any of the patterns.
+    Returns None if there are no patterns.
+    """
+    patterns = tuple(patterns or ())
+    if not patterns:
+        return None
+    if patterns not in _compiled_globs:
+        _compiled_globs[patterns] = re.compile('|'.join(
+                '(?:%s)' % fnmatch.translate(os.path.normcase(pattern))
+                    for pattern in patterns))
+    return _compiled_globs[patterns]
+
 
 __all__ = ['File', 'Folder']
 
@@ -30,13 +61,24 @@ class FS(object):
     The base file system object
     """
 
+    stat_cache = None
+
     def __init__(self, path):
         super(FS, self).__init__()
+        self.path = FS.normalize(path)
+
+    @staticmethod
+    def normalize(path):
+        """
+        Returns the path string of the given path or FS object, normalized
+        the way FS objects normalize their paths.
+        """
+        if isinstance(path, FS):
+            return path.path
         if path == os.sep:
-            self.path = path
-        else:
-            self.path = os.path.expandvars(os.path.expanduser(
-                        unicode(path).strip().rstrip(os.sep)))
+            return path
+        return os.path.expandvars(os.path.expanduser(
+                    unicode(path).strip().rstrip(os.sep)))
 
     def __str__(self):
         return self.path
@@ -69,6 +111,34 @@ class FS(object):
         """
         return os.path.exists(self.path)
 
+    def __stat__(self):
+        """
+        Returns the result of `os.stat` for this path or None if
+        nothing exists at the path. Uses the stat cache if there is one.
+        """
+        if FS.stat_cache is not None:
+            return FS.stat_cache.stat(self.path)
+        try:
+            return os.stat(self.path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def __invalidate__(path=None):
+        """
+        Removes the given path, or every path, from the stat cache.
+        """
+        if FS.stat_cache is not None:
+            FS.stat_cache.invalidate(path)
+
+    @staticmethod
+    def use_stat_cache(enabled=True):
+        """
+        Turns the stat cache on with an empty cache, or off.
+        """
+        FS.stat_cache = StatCache() if enabled else None
+        return FS.stat_cache
+
     @property
     def name(self):
         """
@@ -106,24 +176,34 @@ class FS(object):
         """
         Checks if this folder is inside the given ancestor.
         """
-        stop = Folder(ancestor)
-        for folder in self.ancestors():
-            if folder == stop:
-                return True
-            if stop.depth > folder.depth:
-                return False
-        return False
+        ancestor = FS.normalize(ancestor)
+        if not ancestor:
+            return bool(self.path) and not os.path.isabs(self.path)
+        prefix = ancestor if ancestor.endswith(os.sep) else ancestor + os.sep
+        return self.path != ancestor and self.path.startswith(prefix)
 
     def get_relative_path(self, root):
         """
         Gets the fragment of the current path starting at root.
         """
+        root = FS.normalize(root)
+        memo = self.__dict__.get('_relative_path')
+        if memo and memo[0] == root:
+            return memo[1]
+        prefix = root if root.endswith(os.sep) else root + os.sep
         if self.path == root:
-            return ''
-        ancestors = self.ancestors(stop=root)
-        return functools.reduce(lambda f, p: Folder(p.name).child(f),
-                                            ancestors,
-                                            self.name)
+            relative_path = ''
+        elif root and self.path.startswith(prefix):
+            relative_path = self.path[len(prefix):]
+        else:
+            # Not inside root: the fragment below the top most ancestor.
+            ancestors = self.ancestors(stop=root)
+            relative_path = functools.reduce(
+                                lambda f, p: Folder(p.name).child(f),
+                                ancestors,
+                                self.name)
+        self._relative_path = (root, relative_path)
+        return relative_path
 
     def get_mirror(self, target_root, source_root=None):
         """
@@ -158,11 +238,207 @@ class FS(object):
             return FS.file_or_folder(Folder(destination).child(self.name))
 
 
+class StatCache(object):
+    """
+    Remembers the results of `os.stat` by path. Files written, copied or
+    deleted through `File` are removed from the cache; changes made by
+    any other means are only seen after the cache is cleared, so a
+    cache must be scoped to a single generation or publishing pass.
+    """
+
+    def __init__(self):
+        super(StatCache, self).__init__()
+        self.entries = {}
+        self.invalidations = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stat(self, path):
+        """
+        Returns the result of `os.stat` for the given path or None if
+        nothing exists at the path.
+        """
+        try:
+            result = self.entries[path]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return result
+        self.misses += 1
+        invalidations = self.invalidations
+        try:
+            result = os.stat(path)
+        except OSError:
+            result = None
+        # A writer thread may have changed the path while it was stated.
+        if invalidations == self.invalidations:
+            self.entries[path] = result
+        return result
+
+    def invalidate(self, path=None):
+        """
+        Forgets the given path, or every path if no path is given.
+        """
+        self.invalidations += 1
+        if path is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(path, None)
+
+    def clear(self):
+        """
+        Forgets every path and resets the counters. Called at the
+        start of every pass.
+        """
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
+
+
+class BinaryClassifier(object):
+    """
+    Decides whether files are binary. Files with one of the given
+    text or binary extensions are classified by extension alone. The
+    contents of other files are scanned for NUL bytes once and the
+    result is remembered in `entries` by path, size and modification
+    time. `entries` can be any dictionary, including one that is
+    persisted between generations.
+    """
+
+    def __init__(self, entries=None,
+                    text_extensions=None, binary_extensions=None):
+        super(BinaryClassifier, self).__init__()
+        self.entries = entries if entries is not None else {}
+        self.text_extensions = self.__normalize__(text_extensions)
+        self.binary_extensions = self.__normalize__(binary_extensions)
+
+    @staticmethod
+    def __normalize__(extensions):
+        return set(extension.lstrip('.').lower()
+                        for extension in extensions or [])
+
+    def is_binary(self, afile):
+        """
+        Returns True if the given file is binary.
+        """
+        kind = afile.kind.lower()
+        if kind in self.binary_extensions:
+            return True
+        if kind in self.text_extensions:
+            return False
+        stat = afile.__stat__() or os.stat(afile.path)
+        key = [stat.st_size, stat.st_mtime]
+        entry = self.entries.get(afile.path)
+        if entry and list(entry[:2]) == key:
+            return entry[2]
+        binary = afile.has_binary_contents()
+        self.entries[afile.path] = key + [binary]
+        return binary
+
+
+def _copy(source, target):
+    shutil.copy2(source, target)
+
+def _hardlink(source, target):
+    if not hasattr(os, 'link'):
+        raise NotImplementedError("hardlink requires os.link")
+    os.link(source, target)
+
+def _symlink(source, target):
+    if not hasattr(os, 'symlink'):
+        raise NotImplementedError("symlink requires os.symlink")
+    os.symlink(os.path.abspath(source), target)
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+def _reflink(source, target):
+    try:
+        import fcntl
+    except ImportError:
+        raise NotImplementedError("reflink requires fcntl")
+    with open(source, 'rb') as fin:
+        with open(target, 'wb') as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+    shutil.copystat(source, target)
+
+def _copy_file_range(source, target):
+    import ctypes
+    import errno
+    libc = ctypes.CDLL(None, use_errno=True)
+    if not hasattr(libc, 'copy_file_range'):
+        raise NotImplementedError("copy_file_range is not available")
+    copy_file_range = libc.copy_file_range
+    copy_file_range.argtypes = [ctypes.c_int, ctypes.c_void_p,
+                                ctypes.c_int, ctypes.c_void_p,
+                                ctypes.c_size_t, ctypes.c_uint]
+    copy_file_range.restype = ctypes.c_ssize_t
+    with open(source, 'rb') as fin:
+        with open(target, 'wb') as fout:
+            remaining = os.fstat(fin.fileno()).st_size
+            while remaining > 0:
+                copied = copy_file_range(fin.fileno(), None,
+                                         fout.fileno(), None,
+                                         min(remaining, 1 << 30), 0)
+                if copied < 0:
+                    error = ctypes.get_errno()
+                    raise OSError(error, os.strerror(error))
+                if copied == 0:
+                    raise OSError(errno.EIO,
+                            "copy_file_range stopped before the end")
+                remaining -= copied
+    shutil.copystat(source, target)
+
+# The ways `File.deploy_to` can put a file in place.
+DEPLOY_STRATEGIES = {
+    'copy': _copy,
+    'hardlink': _hardlink,
+    'reflink': _reflink,
+    'copy_file_range': _copy_file_range,
+    'symlink': _symlink
+}
+
+# The ways `Folder.mirror_to` can decide whether a file has changed.
+MIRROR_COMPARISONS = ('size', 'mtime', 'hash')
+
+# Copies keep the modification time only to the microsecond on some
+# platforms (shutil.copy2 on Python 2), so modification times that are
+# closer than this are taken to be the same.
+MTIME_TOLERANCE = 0.001
+
+def is_newer(mtime, basetime):
+    """
+    Returns True if the modification time `mtime` is later than
+    `basetime` by more than `MTIME_TOLERANCE`. Both are timestamps or
+    both are datetimes.
+    """
+    difference = mtime - basetime
+    if isinstance(difference, timedelta):
+        difference = difference.total_seconds()
+    return difference >= MTIME_TOLERANCE
+
+def same_mtime(mtime, other):
+    """
+    Returns True if the given modification times are the same, within
+    `MTIME_TOLERANCE`.
+    """
+    return not is_newer(mtime, other) and not is_newer(other, mtime)
+
+
 class File(FS):
     """
     The File object.
     """
 
+    # Deploy strategies that have failed in this process. They are
+    # not tried again.
+    failed_strategies = set()
+
+    # Used by `is_binary`. Resources are classified by the classifier
+    # of their site instead, which follows the site configuration.
+    classifier = BinaryClassifier()
+
     def __init__(self, path):
         super(File, self).__init__(path)
 
@@ -187,15 +463,35 @@ class File(FS):
         """
         return self.extension.lstrip(".")
 
+    @property
+    def exists(self):
+        """
+        Does the file exist?
+        """
+        return self.__stat__() is not None
+
     @property
     def size(self):
         """
         Size of this file.
         """
+        stat = self.__stat__()
+        if stat is None:
+            return -1
+        return stat.st_size
 
+    def checksum(self, algorithm='sha1'):
+        """
+        Returns the hex digest of the contents of this file computed
+        with the given hashlib algorithm. Returns None if the file
+        does not exist.
+        """
         if not self.exists:
-            return -1
-        return os.path.getsize(self.path)
+            return None
+        hasher = hashlib.new(algorithm)
+        for chunk in self.iter_chunks():
+            hasher.update(chunk)
+        return hasher.hexdigest()
 
     @property
     def mimetype(self):
@@ -208,15 +504,18 @@ class File(FS):
     @property
     def is_binary(self):
         """Return true if this is a binary file."""
-        with open(self.path, 'rb') as fin:
-            CHUNKSIZE = 1024
-            while 1:
-                chunk = fin.read(CHUNKSIZE)
-                if '\0' in chunk:
-                    return True
-                if len(chunk) < CHUNKSIZE:
-                    break
-        return False
+        return File.classifier.is_binary(self)
+
+    def has_binary_contents(self):
+        """
+        Return true if the contents of this file contain a NUL byte.
+        """
+        try:
+            with self.open_mmap() as data:
+                return data.find('\0') != -1
+        except ValueError:
+            # The file is empty now, whatever its cached size says.
+            return False
 
     @property
     def is_text(self):
@@ -233,10 +532,11 @@ class File(FS):
     def last_modified(self):
         """
         Returns a datetime object representing the last modified time.
-        Calls os.path.getmtime.
+        Calls os.stat, through the stat cache if there is one.
 
         """
-        return datetime.fromtimestamp(os.path.getmtime(self.path))
+        stat = self.__stat__() or os.stat(self.path)
+        return datetime.fromtimestamp(stat.st_mtime)
 
     def has_changed_since(self, basetime):
         """
@@ -274,6 +574,41 @@ class File(FS):
             read_text = fin.read()
         return read_text
 
+    def read_bytes(self):
+        """
+        Reads from the file and returns the content as a byte string,
+        without decoding it.
+        """
+        with open(self.path, 'rb') as fin:
+            return fin.read()
+
+    def iter_chunks(self, size=1024 * 64):
+        """
+        Yields the content of the file as byte strings of at most
+        `size` bytes.
+        """
+        with open(self.path, 'rb') as fin:
+            while True:
+                chunk = fin.read(size)
+                if not chunk:
+                    break
+                yield chunk
+
+    @contextmanager
+    def open_mmap(self):
+        """
+        Maps the file into memory, read only, for the duration of a
+        `with` statement. The mapping supports slicing, `find` and
+        the file interface without reading the whole file into a
+        string. Empty files cannot be mapped and raise ValueError.
+        """
+        with open(self.path, 'rb') as fin:
+            data = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield data
+            finally:
+                data.close()
+
     def write(self, text, encoding="utf-8"):
         """
         Writes the given text to the file using the given encoding.
@@ -281,6 +616,7 @@ class File(FS):
         logger.info("Writing to %s" % self)
         with codecs.open(self.path, 'w', encoding) as fout:
             fout.write(text)
+        FS.__invalidate__(self.path)
 
     def copy_to(self, destination):
         """
@@ -291,14 +627,96 @@ class File(FS):
         target = self.__get_destination__(destination)
         logger.info("Copying %s to %s" % (self, target))
         shutil.copy(self.path, unicode(destination))
+        FS.__invalidate__(target.path)
         return target
 
+    def __replace_with__(self, write):
+        """
+        Calls `write` with the path of a temporary file next to this file
+        and renames the temporary file to this file when it returns.
+        Readers never see a partially written file.
+        """
+        temp = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            write(temp)
+            if os.name == 'nt' and self.exists:
+                os.remove(self.path)
+            os.rename(temp, self.path)
+        except:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        finally:
+            FS.__invalidate__(self.path)
+
+    def __has_contents__(self, size, checksum):
+        """
+        Returns True if this file exists and has the given size and
+        checksum. The size is compared first to avoid hashing files
+        that have obviously changed.
+        """
+        return (self.size == size and
+                self.checksum() == checksum())
+
+    def write_if_changed(self, text, encoding="utf-8"):
+        """
+        Writes the given text to the file using the given encoding unless
+        the file already has exactly those contents. Returns True if the
+        file was written.
+        """
+        data = text.encode(encoding) if isinstance(text, unicode) else text
+        if self.__has_contents__(len(data),
+                        lambda: hashlib.sha1(data).hexdigest()):
+            logger.info("Unchanged %s" % self)
+            return False
+        logger.info("Writing to %s" % self)
+        def write(path):
+            with open(path, 'wb') as fout:
+                fout.write(data)
+        self.__replace_with__(write)
+        return True
+
+    def deploy_to(self, destination, strategy='copy'):
+        """
+        Puts this file at the given destination using one of the
+        `DEPLOY_STRATEGIES`, falling back to copying if the strategy is
+        not supported. The modification time is preserved. Nothing is
+        done if the destination already has the same size and
+        modification time. Returns True if the destination was written.
+        """
+        target = File(unicode(destination))
+        source_stat = self.__stat__() or os.stat(self.path)
+        target_stat = target.__stat__()
+        if target_stat is not None:
+            if target_stat.st_size == source_stat.st_size and \
+               same_mtime(target_stat.st_mtime, source_stat.st_mtime):
+                logger.info("Unchanged %s" % target)
+                return False
+        if strategy not in DEPLOY_STRATEGIES:
+            raise ValueError("Unknown deploy strategy [%s]" % strategy)
+        strategies = [strategy] if strategy == 'copy' else [strategy, 'copy']
+        for name in strategies:
+            if name in File.failed_strategies:
+                continue
+            logger.info("Deploying %s to %s [%s]" % (self, target, name))
+            try:
+                target.__replace_with__(
+                    functools.partial(DEPLOY_STRATEGIES[name], self.path))
+                return True
+            except (OSError, IOError, NotImplementedError), error:
+                if name == 'copy':
+                    raise
+                logger.warning("Cannot deploy with [%s], falling back to"
+                               " copying: %s" % (name, error))
+                File.failed_strategies.add(name)
+
     def delete(self):
         """
         Delete the file if it exists.
         """
         if self.exists:
             os.remove(self.path)
+            FS.__invalidate__(self.path)
 
 
 class FSVisitor(object):
@@ -491,6 +909,116 @@ class FolderLister(FSVisitor):
             self.visit_complete()
 
 
+class FolderScanner(object):
+    """
+    Scans the hierarchy of a folder, skipping the files and folders whose
+    names match any of the `ignore` patterns. Uses `scandir` where it is
+    available (the `scandir` extra installs it on Python 2); otherwise
+    every name is stated, as `os.walk` does. If `threads` is greater than zero, the top level subtrees
+    are scanned by a pool of that many threads, which helps on network
+    file systems. Folder listings are taken from the given `snapshot`
+    (a `hyde.model.Snapshot`) when they are up to date.
+    """
+
+    def __init__(self, folder, ignore=None, threads=0, snapshot=None):
+        super(FolderScanner, self).__init__()
+        self.folder = folder
+        self.ignore = compile_globs(ignore)
+        self.threads = threads
+        self.snapshot = snapshot
+
+    def ignored(self, name):
+        """
+        Returns True if the given name matches an ignore pattern.
+        """
+        return bool(self.ignore and
+                    self.ignore.match(os.path.normcase(name)))
+
+    def read(self, path):
+        """
+        Returns the names of all the folders and the files in the
+        given path.
+        """
+        folders = []
+        files = []
+        # Links to folders are followed, as `FolderWalker` does.
+        if scandir:
+            for entry in scandir(path):
+                if entry.is_dir():
+                    folders.append(entry.name)
+                else:
+                    files.append(entry.name)
+        else:
+            for name in os.listdir(path):
+                if os.path.isdir(os.path.join(path, name)):
+                    folders.append(name)
+                else:
+                    files.append(name)
+        return (folders, files)
+
+    def list(self, path):
+        """
+        Returns the names of the folders and the files in the given path
+        that are not ignored. If a snapshot is given, the folder is only
+        read if it has changed since it was recorded in the snapshot.
+        """
+        if self.snapshot is not None:
+            (folders, files) = self.snapshot.listing(path,
+                                        functools.partial(self.read, path))
+        else:
+            (folders, files) = self.read(path)
+        return ([name for name in folders if not self.ignored(name)],
+                [name for name in files if not self.ignored(name)])
+
+    def scan_tree(self, path):
+        """
+        Returns a (path, file names) tuple for the given path and every
+        folder below it, parents first.
+        """
+        result = []
+        stack = [path]
+        while stack:
+            path = stack.pop()
+            try:
+                (folders, files) = self.list(path)
+            except OSError, error:
+                logger.warning("Cannot scan [%s]: %s" % (path, error))
+                continue
+            result.append((path, files))
+            stack.extend(os.path.join(path, name)
+                            for name in reversed(folders))
+        return result
+
+    def scan(self):
+        """
+        Returns a (path, file names) tuple for every folder that is not
+        ignored, in the order `os.walk` visits them.
+        """
+        started = time.time()
+        root = self.folder.path
+        if self.ignored(self.folder.name):
+            return []
+        if not self.threads:
+            result = self.scan_tree(root)
+        else:
+            (folders, files) = self.list(root)
+            pool = ThreadPool(self.threads)
+            try:
+                subtrees = pool.map(self.scan_tree,
+                                    [os.path.join(root, name)
+                                        for name in folders])
+            finally:
+                pool.close()
+                pool.join()
+            result = [(root, files)]
+            for subtree in subtrees:
+                result.extend(subtree)
+        logger.info("Scanned [%d] folders and [%d] files in [%s] in %.3fs" %
+                        (len(result), sum(len(files) for _, files in result),
+                         root, time.time() - started))
+        return result
+
+
 class Folder(FS):
     """
     Represents a directory.
@@ -520,6 +1048,7 @@ class Folder(FS):
             if not self.exists:
                 logger.info("Creating %s" % self.path)
                 os.makedirs(self.path)
+                FS.__invalidate__(self.path)
         except os.error:
             pass
         return self
@@ -531,6 +1060,7 @@ class Folder(FS):
         if self.exists:
             logger.info("Deleting %s" % self.path)
             shutil.rmtree(self.path)
+            FS.__invalidate__()
 
     def copy_to(self, destination):
         """
@@ -540,6 +1070,7 @@ class Folder(FS):
         target = self.__get_destination__(destination)
         logger.info("Copying %s to %s" % (self, target))
         shutil.copytree(self.path, unicode(target))
+        FS.__invalidate__()
         return target
 
     def move_to(self, destination):
@@ -550,6 +1081,7 @@ class Folder(FS):
         target = self.__get_destination__(destination)
         logger.info("Move %s to %s" % (self, target))
         shutil.move(self.path, unicode(target))
+        FS.__invalidate__()
         return target
 
     def rename_to(self, destination_name):
@@ -560,6 +1092,7 @@ class Folder(FS):
         target = self.parent.child_folder(destination_name)
         logger.info("Rename %s to %s" % (self, target))
         shutil.move(self.path, unicode(target))
+        FS.__invalidate__()
         return target
 
     def _create_target_tree(self, target):
@@ -589,8 +1122,99 @@ class Folder(FS):
         target.make()
         self._create_target_tree(target)
         dir_util.copy_tree(self.path, unicode(target))
+        FS.__invalidate__()
         return target
 
+    def __scan_relative__(self, ignore=None, threads=0):
+        """
+        Returns the sets of the relative paths of the folders and the
+        files below this directory. The directory itself is ''.
+        """
+        folders = set()
+        files = set()
+        for (path, names) in self.get_scanner(ignore, threads).scan():
+            folder = path[len(self.path) + 1:]
+            folders.add(folder)
+            files.update(os.path.join(folder, name) for name in names)
+        return (folders, files)
+
+    def mirror_to(self, destination, compare='mtime', delete=False,
+                        threads=0, ignore=None):
+        """
+        Makes the given destination a mirror of the contents of this
+        directory, copying only the files that are missing or have
+        changed. `compare` is one of `MIRROR_COMPARISONS`: `size`
+        compares sizes, `mtime` sizes and modification times and `hash`
+        sizes and checksums. Copies preserve modification times and
+        run on `threads` threads. If `delete` is True, the files of the
+        destination that are not in this directory are deleted, and so
+        are the folders that are not in this directory once they are
+        empty. Names matching the `ignore` patterns are neither copied
+        nor deleted, nor are the folders that contain them.
+
+        Returns a list of (change, relative path) tuples, sorted by
+        path, where change is `added`, `updated` or `deleted`.
+        """
+        if compare not in MIRROR_COMPARISONS:
+            raise ValueError("Unknown comparison [%s]" % compare)
+        logger.info("Mirroring %s to %s" % (self, destination))
+        target = Folder(destination)
+        target.make()
+        (folders, files) = self.__scan_relative__(ignore, threads)
+        for folder in sorted(folders):
+            if folder:
+                Folder(target.child(folder)).make()
+
+        def mirror(name):
+            source = File(self.child(name))
+            mirrored = File(target.child(name))
+            source_stat = source.__stat__()
+            mirrored_stat = mirrored.__stat__()
+            if mirrored_stat is None:
+                change = 'added'
+            elif mirrored_stat.st_size != source_stat.st_size or \
+                 (compare == 'mtime' and
+                    not same_mtime(mirrored_stat.st_mtime,
+                                   source_stat.st_mtime)) or \
+                 (compare == 'hash' and
+                    mirrored.checksum() != source.checksum()):
+                change = 'updated'
+            else:
+                return None
+            logger.info("Copying %s to %s" % (source, mirrored))
+            mirrored.__replace_with__(functools.partial(_copy, source.path))
+            return (change, name)
+
+        names = sorted(files)
+        if threads:
+            pool = ThreadPool(threads)
+            try:
+                results = pool.map(mirror, names)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [mirror(name) for name in names]
+        changes = [result for result in results if result]
+
+        if delete:
+            (mirrored_folders, mirrored_files) = \
+                    target.__scan_relative__(ignore, threads)
+            for name in sorted(mirrored_files - files):
+                File(target.child(name)).delete()
+                changes.append(('deleted', name))
+            # Children sort after their parents.
+            for folder in sorted(mirrored_folders - folders, reverse=True):
+                path = target.child(folder)
+                if not os.listdir(path):
+                    logger.info("Deleting %s" % path)
+                    os.rmdir(path)
+                    FS.__invalidate__(path)
+                    changes.append(('deleted', folder))
+        logger.info("Mirrored %s to %s: [%d] changes" %
+                        (self, target, len(changes)))
+        return sorted(changes, key=lambda change: change[1])
+
     def get_walker(self, pattern=None):
         """
         Return a `FolderWalker` object with a set pattern.
@@ -604,6 +1228,13 @@ class Folder(FS):
         """
         return FolderWalker(self)
 
+    def get_scanner(self, ignore=None, threads=0, snapshot=None):
+        """
+        Return a `FolderScanner` object that skips the names matching
+        the given patterns.
+        """
+        return FolderScanner(self, ignore, threads, snapshot)
+
     def get_lister(self, pattern=None):
         """
         Return a `FolderLister` object with a set pattern.
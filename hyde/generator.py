@@ -3,20 +3,92 @@
 The generator class and related utility functions.
 """
 
+from hyde.cache import RenderCache
 from hyde.exceptions import HydeException
-from hyde.fs import File, Folder
-from hyde.model import Context, Dependents
+from hyde.fs import File, Folder, FS, is_newer
+from hyde.model import Context, Dependents, FileTypes, Manifest, Outputs
 from hyde.plugin import Plugin
+from hyde.profiler import Profiler
+from hyde.shard import in_shard, write_shard_manifest
 from hyde.template import Template
 from hyde.site import Node, Resource
+from hyde.writer import OutputWriter
 
 from contextlib import contextmanager
 from datetime import datetime
-
+from functools import partial
+
+import fnmatch
+import hashlib
+import multiprocessing
+import os
+import time
+import yaml
 from shutil import copymode
 from hyde.util import getLoggerWithNullHandler
+from hyde.version import __version__
 logger = getLoggerWithNullHandler('hyde.engine')
 
+# Configuration keys that do not affect the rendered output
+# and are left out of the render cache keys.
+RENDER_CACHE_IGNORED_CONFIG = ('deploy_root', 'publisher', 'server',
+                                'change_detection', 'render_cache', 'store',
+                                'source_cache_size', 'deploy_strategy',
+                                'scan_threads', 'snapshot', 'stat_cache')
+
+# The generator that the worker processes of a parallel
+# generation render with. The workers are forked after the
+# site has been loaded and `begin_site` has been fired, so
+# each one inherits its own copy of the site, the template
+# environment and the plugins. The resources to render are
+# handed to the workers as indices into `_worker_resources`:
+# generated resources, like the pages of a paginator, share
+# the relative path of the resource they were made from.
+_worker_generator = None
+_worker_resources = None
+
+
+def _initialize_worker():
+    """
+    Prepares a forked worker process for rendering.
+    """
+    _worker_generator.template.use_private_caches()
+
+
+def _generate_resources_in_worker(args):
+    """
+    Generates the resources at the given indices in a worker process
+    and returns what was recorded for them: dependencies, manifest
+    entries, changed outputs, render cache statistics and profiling
+    measurements.
+    """
+    (indices, incremental) = args
+    resources = [_worker_resources[index] for index in indices]
+    gen = _worker_generator
+    (hits, misses) = (gen.render_cache.hits, gen.render_cache.misses)
+    source_cache = gen.site.source_cache
+    (source_hits, source_misses) = (source_cache.hits, source_cache.misses)
+    gen.profiler.reset()
+    changed_outputs = set(gen.changed_outputs)
+    result = dict(deps={}, manifest={})
+    for resource in resources:
+        gen.__generate_resource__(resource, incremental)
+    gen.writer.drain()
+    for resource in resources:
+        relative_path = resource.relative_path
+        if relative_path in gen.deps:
+            result['deps'][relative_path] = gen.deps[relative_path]
+        deploy_path = resource.relative_deploy_path
+        if deploy_path in gen.manifest:
+            result['manifest'][deploy_path] = gen.manifest[deploy_path]
+    result['changed_outputs'] = gen.changed_outputs - changed_outputs
+    result['profile'] = gen.profiler.records
+    result['render_cache'] = (gen.render_cache.hits - hits,
+                                gen.render_cache.misses - misses)
+    result['source_cache'] = (source_cache.hits - source_hits,
+                                source_cache.misses - source_misses)
+    return result
+
 
 class Generator(object):
     """
@@ -27,12 +99,24 @@ class Generator(object):
         super(Generator, self).__init__()
         self.site = site
         self.generated_once = False
-        self.deps = Dependents(site.sitepath)
+        self.deps = Dependents(site.sitepath, store=site.config.store)
+        self.manifest = Manifest(site.sitepath, store=site.config.store)
+        self.outputs = Outputs(site.sitepath, store=site.config.store)
+        site.classifier.entries = FileTypes(site.sitepath,
+                                            store=site.config.store)
+        FS.use_stat_cache(site.config.stat_cache)
+        self.render_cache = RenderCache(site.sitepath)
+        self.checksums = {}
+        self.changed_outputs = set()
+        self.removed_outputs = set()
+        self.shard = None
         self.create_context()
         self.template = None
         Plugin.load_all(site)
 
-        self.events = Plugin.get_proxy(self.site)
+        self.profiler = Profiler()
+        self.events = Plugin.get_proxy(self.site, self.profiler)
+        self.writer = OutputWriter(profiler=self.profiler)
 
     def create_context(self):
         site = self.site
@@ -99,6 +183,13 @@ class Generator(object):
         Start Generation. Perform setup tasks and inform plugins.
         """
         logger.debug("Begin Generation")
+        self.site.config.invalidate()
+        self.checksums = {}
+        self.changed_outputs = set()
+        self.removed_outputs = set()
+        self.site.source_cache.clear()
+        if FS.stat_cache is not None:
+            FS.stat_cache.clear()
         self.events.begin_generation()
 
     def load_site_if_needed(self):
@@ -113,6 +204,9 @@ class Generator(object):
         Generation complete. Inform plugins and cleanup.
         """
         logger.debug("Generation Complete")
+        if FS.stat_cache is not None:
+            logger.debug("Stat cache: [%d] hits, [%d] misses" %
+                        (FS.stat_cache.hits, FS.stat_cache.misses))
         self.events.generation_complete()
 
     def get_dependencies(self, resource):
@@ -129,7 +223,7 @@ class Generator(object):
         """
         Updates the dependencies for the given resource.
         """
-        if not resource.source_file.is_text:
+        if not resource.is_text:
             return []
         rel_path = resource.relative_path
         deps = []
@@ -148,64 +242,361 @@ class Generator(object):
         self.deps[rel_path] = deps
         return deps
 
+    def get_dependency_file(self, dep):
+        """
+        Gets the file for the given dependency. Dependencies are looked
+        up in the content folder first and then in the layout folder.
+        """
+        content = self.site.content.source_folder
+        layout = Folder(self.site.sitepath).child_folder('layout')
+        source = File(content.child(dep))
+        if not source.exists:
+            source = File(layout.child(dep))
+        return source
+
+    def get_checksum(self, afile):
+        """
+        Gets the checksum of the given file. The checksums of
+        dependencies are computed only once per generation.
+        """
+        path = unicode(afile)
+        if not path in self.checksums:
+            self.checksums[path] = File(path).checksum()
+        return self.checksums[path]
+
     def has_resource_changed(self, resource):
         """
         Checks if the given resource has changed since the
         last generation.
         """
+        return self.get_change_reason(resource) is not None
+
+    def get_change_reason(self, resource):
+        """
+        Returns the reason the given resource has to be regenerated
+        or None if it has not changed since the last generation.
+        """
         logger.debug("Checking for changes in %s" % resource)
         self.load_template_if_needed()
         self.load_site_if_needed()
 
         target = File(self.site.config.deploy_root_path.child(
                                 resource.relative_deploy_path))
-        if not target.exists or target.older_than(resource.source_file):
+        if self.site.config.change_detection == 'hash':
+            return self.get_checksum_change_reason(resource, target)
+        if not target.exists:
             logger.debug("Found changes in %s" % resource)
-            return True
-        if resource.source_file.is_binary:
+            return "missing target"
+        generated = self.get_generation_time(resource, target)
+        if is_newer(resource.source_file.last_modified, generated):
+            logger.debug("Found changes in %s" % resource)
+            return "source newer"
+        if resource.is_binary:
             logger.debug("No Changes found in %s" % resource)
-            return False
+            return None
         if self.site.config.needs_refresh() or \
-           not target.has_changed_since(self.site.config.last_modified):
+           not generated > self.site.config.last_modified:
             logger.debug("Site configuration changed")
-            return True
+            return "config changed"
 
         deps = self.get_dependencies(resource)
         if not deps or None in deps:
             logger.debug("No changes found in %s" % resource)
-            return False
-        content = self.site.content.source_folder
-        layout = Folder(self.site.sitepath).child_folder('layout')
+            return None
         logger.debug("Checking for changes in dependents:%s" % deps)
         for dep in deps:
             if not dep:
-                return True
-            source = File(content.child(dep))
+                return "unknown dependency"
+            source = self.get_dependency_file(dep)
             if not source.exists:
-                source = File(layout.child(dep))
-            if not source.exists:
-                return True
-            if target.older_than(source):
-                return True
+                return "dependency missing: %s" % dep
+            if is_newer(source.last_modified, generated):
+                return "dependency changed: %s" % dep
         logger.debug("No changes found in %s" % resource)
-        return False
+        return None
 
-    def generate_all(self, incremental=False):
+    def get_generation_time(self, resource, target):
+        """
+        Returns the time the output of the given resource was last
+        generated. Outputs that are identical to the existing target are
+        not written, so this is the later of the modification time of the
+        target and the time the target was last found to be up to date.
+        """
+        generated = target.last_modified
+        entry = self.manifest.get(resource.relative_deploy_path) or {}
+        if entry.get('verified'):
+            generated = max(generated,
+                            datetime.fromtimestamp(entry['verified']))
+        return generated
+
+    def get_checksum_change_reason(self, resource, target):
         """
-        Generates the entire website
+        Returns the reason the given resource has to be regenerated by
+        comparing the checksums recorded in the manifest with the current
+        checksums of its source, output, configuration and dependencies.
+        Modification times are not considered.
         """
+        entry = self.manifest.get(resource.relative_deploy_path)
+        if not target.exists:
+            logger.debug("Found changes in %s" % resource)
+            return "missing target"
+        if not entry:
+            logger.debug("Found changes in %s" % resource)
+            return "not in manifest"
+        if entry.get('source') != resource.source_file.checksum():
+            logger.debug("Found changes in %s" % resource)
+            return "source changed"
+        if entry.get('output') != target.checksum():
+            logger.debug("Found changes in %s" % resource)
+            return "target changed"
+        if resource.is_binary:
+            logger.debug("No Changes found in %s" % resource)
+            return None
+        if entry.get('config') != self.site.config.checksum:
+            logger.debug("Site configuration changed")
+            return "config changed"
+
+        deps = [dep for dep in self.get_dependencies(resource) if dep]
+        recorded = entry.get('deps', {})
+        if set(deps) != set(recorded):
+            return "dependencies changed"
+        logger.debug("Checking for changes in dependents:%s" % deps)
+        for dep in deps:
+            source = self.get_dependency_file(dep)
+            if recorded[dep] != self.get_checksum(source):
+                return "dependency changed: %s" % dep
+        logger.debug("No changes found in %s" % resource)
+        return None
+
+    def get_render_key(self, resource):
+        """
+        Computes the render cache key for the given text resource from
+        its source, metadata, deploy path, transitive dependencies, the
+        configuration values that affect rendering and the context
+        providers. Returns None if the resource must not be cached.
+        """
+        meta = getattr(resource, 'meta', None)
+        if meta and not meta.get('render_cache', True):
+            return None
+        config = self.site.config
+        hasher = hashlib.sha1(__version__)
+        hasher.update(resource.source_file.checksum())
+        hasher.update(resource.relative_deploy_path.encode('utf-8'))
+        hasher.update(str(resource.uses_template))
+        try:
+            if meta:
+                hasher.update(yaml.dump(meta.to_dict()))
+        except yaml.YAMLError:
+            return None
+        for dep in sorted(dep for dep in self.get_dependencies(resource)
+                                if dep):
+            hasher.update(dep.encode('utf-8'))
+            hasher.update(self.get_checksum(
+                            self.get_dependency_file(dep)) or '')
+        hasher.update(config.get_checksum(
+                            exclude=RENDER_CACHE_IGNORED_CONFIG))
+        try:
+            providers = config.context.providers.to_dict()
+        except AttributeError:
+            providers = {}
+        for name, path in sorted(providers.items()):
+            hasher.update(name)
+            hasher.update(self.get_checksum(
+                            File(self.site.sitepath.child(path))) or '')
+        return hasher.hexdigest()
+
+    def update_manifest(self, resource, target):
+        """
+        Records the checksums of the source, output, configuration and
+        dependencies of the given resource after it has been generated.
+        """
+        entry = dict(source=resource.source_file.checksum(),
+                     output=target.checksum())
+        if resource.is_text:
+            entry['config'] = self.site.config.checksum
+            entry['deps'] = dict((dep,
+                                self.get_checksum(self.get_dependency_file(dep)))
+                                    for dep in self.get_dependencies(resource)
+                                        if dep)
+        self.manifest[resource.relative_deploy_path] = entry
+
+    def generate_all(self, incremental=False, jobs=1, shard=None):
+        """
+        Generates the entire website. If `jobs` is greater than one,
+        the resources are rendered by that many worker processes. If a
+        (K, N) `shard` is given, only the resources of that shard are
+        rendered and a shard manifest is written to the deploy folder.
+        """
+        try:
+            self.__generate_all__(incremental, jobs, shard)
+        finally:
+            self.writer.stop()
+
+    def __generate_all__(self, incremental, jobs, shard):
+        self.shard = shard
+        logger.info("Reading site contents")
+        profiler = self.profiler
+        with profiler.measure('phase', 'load'):
+            self.load_template_if_needed()
+            self.template.clear_caches()
+            self.initialize()
+            self.load_site_if_needed()
+        with profiler.measure('phase', 'begin_site'):
+            self.events.begin_site()
+        logger.info("Generating site to [%s]" %
+                        self.site.config.deploy_root_path)
+        with profiler.measure('phase', 'generate'):
+            if jobs > 1:
+                self.__generate_node_in_parallel__(self.site.content,
+                                                    incremental, jobs)
+            else:
+                self.__generate_node__(self.site.content, incremental)
+        with profiler.measure('phase', 'site_complete'):
+            self.events.site_complete()
+        with profiler.measure('phase', 'prune'):
+            self.prune_outputs()
+        if shard:
+            write_shard_manifest(self, shard)
+        self.finalize()
+        self.generated_once = True
+        logger.info("[%d] outputs changed, [%d] removed" %
+                    (len(self.changed_outputs), len(self.removed_outputs)))
+        logger.info("Source cache: [%d] hits, [%d] misses" %
+                    (self.site.source_cache.hits,
+                     self.site.source_cache.misses))
+        if self.site.config.render_cache:
+            logger.info("Render cache: [%d] hits, [%d] misses" %
+                    (self.render_cache.hits, self.render_cache.misses))
+
+    def select_resources(self, patterns):
+        """
+        Returns the resources whose relative or deploy path matches one
+        of the given glob patterns, together with every resource that
+        depends on them according to the recorded dependency graph.
+        Patterns may also match templates, with or without the layout
+        folder prefix, to select the resources that use them.
+        """
+        def matches(path):
+            path = path.replace(os.sep, '/')
+            return any(fnmatch.fnmatch(path, pattern)
+                            for pattern in patterns)
+
+        layout_root = self.site.config.layout_root.rstrip('/') + '/'
+        paths = set()
+        for resource in self.site.content.walk_resources():
+            if matches(resource.relative_path) or \
+               matches(resource.relative_deploy_path):
+                paths.add(resource.relative_path)
+        for dep in self.deps.reverse:
+            if matches(dep) or matches(layout_root + dep):
+                paths.add(dep)
+        for path in list(paths):
+            paths.update(self.deps.dependents_of(path))
+        return [resource for resource in self.site.content.walk_resources()
+                    if resource.relative_path in paths]
+
+    def generate_only(self, patterns):
+        """
+        Loads the site and fires `begin_site` once, then generates only
+        the resources selected by `select_resources`. The rest of the
+        deployed site is left as it is.
+        """
+        try:
+            return self.__generate_only__(patterns)
+        finally:
+            self.writer.stop()
+
+    def __generate_only__(self, patterns):
+        self.shard = None
         logger.info("Reading site contents")
         self.load_template_if_needed()
         self.template.clear_caches()
         self.initialize()
         self.load_site_if_needed()
         self.events.begin_site()
-        logger.info("Generating site to [%s]" %
-                        self.site.config.deploy_root_path)
-        self.__generate_node__(self.site.content, incremental)
+        resources = self.select_resources(patterns)
+        logger.info("Generating [%d] resources matching %s" %
+                        (len(resources), ', '.join(patterns)))
+        selected = set(resources)
+        self.refresh_config()
+        for node in self.site.content.walk():
+            node_resources = [resource for resource in node.resources
+                                if resource in selected]
+            if not node_resources:
+                continue
+            self.events.begin_node(node)
+            for resource in node_resources:
+                self.__generate_resource__(resource)
+            self.events.node_complete(node)
+        self.writer.drain()
         self.events.site_complete()
         self.finalize()
         self.generated_once = True
+        logger.info("[%d] outputs changed" % len(self.changed_outputs))
+        return resources
+
+    def prune_outputs(self):
+        """
+        Deletes the files that earlier generations wrote to the deploy
+        folder for resources that no longer exist or that are deployed
+        to a different path now. Records the outputs of the current
+        site for the next generation.
+        """
+        deploy_root = self.site.config.deploy_root_path
+        current = {}
+        for resource in self.site.content.walk_resources():
+            if resource.is_processable:
+                current[resource.relative_deploy_path] = \
+                                            resource.relative_path
+        orphans = [path for path in self.outputs if path not in current]
+        for path in orphans:
+            if os.path.isabs(path):
+                # Recorded by an older version, which kept absolute paths.
+                del self.outputs[path]
+                continue
+            target = File(deploy_root.child(path))
+            relative_path = target.get_relative_path(deploy_root)
+            if target.exists:
+                logger.info("Removing stale output [%s]" % relative_path)
+                target.delete()
+                self.removed_outputs.add(relative_path)
+            folder = target.parent
+            while folder.is_descendant_of(deploy_root) and \
+                  folder.exists and not os.listdir(folder.path):
+                os.rmdir(folder.path)
+                folder = folder.parent
+            del self.outputs[path]
+        for path, relative_path in current.iteritems():
+            if self.outputs.get(path) != relative_path:
+                self.outputs[path] = relative_path
+
+    def plan(self):
+        """
+        Returns the resources that an incremental generation would
+        regenerate as a list of (resource, reason) tuples. Nothing is
+        rendered or written and the dependencies found on the way are
+        not recorded. The site events are fired so that plugins can
+        prepare the site and clean up as they do for a generation.
+        """
+        self.load_template_if_needed()
+        self.initialize()
+        self.load_site_if_needed()
+        self.events.begin_site()
+        deps = self.deps
+        self.deps = dict(deps)
+        try:
+            plan = []
+            for resource in self.site.content.walk_resources():
+                if not resource.is_processable:
+                    continue
+                reason = self.get_change_reason(resource)
+                if reason:
+                    plan.append((resource, reason))
+        finally:
+            self.deps = deps
+            self.events.site_complete()
+            self.finalize()
+        return plan
 
     def generate_node_at_path(self, node_path=None, incremental=False):
         """
@@ -285,6 +676,7 @@ class Generator(object):
         try:
             with self.events_for(resource):
                 self.__generate_resource__(resource, incremental)
+                self.writer.drain()
         except HydeException:
             self.generate_all()
 
@@ -302,45 +694,201 @@ class Generator(object):
             for resource in node.resources:
                 self.__generate_resource__(resource, incremental)
             self.events.node_complete(node)
+        self.writer.drain()
+
+    def __generate_node_in_parallel__(self, node, incremental=False, jobs=2):
+        """
+        Spreads the resources in the given node across a pool of `jobs`
+        worker processes. `begin_node` is fired for every node before
+        the workers are started and `node_complete` once they are
+        done. The dependencies, manifest entries, changed outputs, render
+        cache statistics and profiling measurements recorded by the
+        workers are merged back.
+        """
+        if not hasattr(os, 'fork'):
+            logger.warning("Parallel generation requires os.fork."
+                            " Generating with a single process.")
+            return self.__generate_node__(node, incremental)
+
+        global _worker_generator, _worker_resources
+        self.refresh_config()
+        nodes = list(node.walk())
+        for child in nodes:
+            logger.debug("Generating Node [%s]", child)
+            self.events.begin_node(child)
+        resources = [resource
+                        for child in nodes
+                            for resource in child.resources
+                                if resource.is_processable and
+                                    in_shard(resource, self.shard)]
+        size = max(1, len(resources) // (jobs * 4))
+        chunks = [(range(i, min(i + size, len(resources))), incremental)
+                    for i in range(0, len(resources), size)]
+        logger.info("Rendering [%d] resources with [%d] processes" %
+                        (len(resources), jobs))
+        # The workers must not inherit the writer threads or their queues.
+        self.writer.stop()
+        _worker_generator = self
+        _worker_resources = resources
+        pool = multiprocessing.Pool(jobs, _initialize_worker)
+        try:
+            for result in pool.imap_unordered(
+                                _generate_resources_in_worker, chunks):
+                self.deps.update(result['deps'])
+                self.manifest.update(result['manifest'])
+                self.changed_outputs.update(result['changed_outputs'])
+                self.profiler.merge(result['profile'])
+                (hits, misses) = result['render_cache']
+                self.render_cache.hits += hits
+                self.render_cache.misses += misses
+                (hits, misses) = result['source_cache']
+                self.site.source_cache.hits += hits
+                self.site.source_cache.misses += misses
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            _worker_generator = None
+            _worker_resources = None
+            # The workers have written files this process has stated.
+            FS.__invalidate__()
+        for child in nodes:
+            self.events.node_complete(child)
+
+    def binary_hooks_overridden(self):
+        """
+        Returns True if a plugin handles the binary resource events.
+        Such plugins may change the deployed file in place.
+        """
+        return any(plugin.overrides(hook)
+                    for plugin in self.site.plugins
+                        for hook in ('begin_binary_resource',
+                                     'binary_resource_complete'))
 
+    def get_binary_deploy_strategy(self):
+        """
+        Returns the configured deploy strategy for binary resources.
+        Plugins that handle the binary resource events may change the
+        deployed file in place, which would change the source through a
+        hard or symbolic link. Such files are copied instead.
+        """
+        strategy = self.site.config.deploy_strategy
+        if strategy in ('hardlink', 'symlink') and \
+                self.binary_hooks_overridden():
+            return 'copy'
+        return strategy
+
+    def __render_resource__(self, resource, context):
+        if resource.uses_template:
+            logger.debug("Rendering [%s]", resource)
+            try:
+                text = self.template.render_resource(resource,
+                                context)
+            except Exception:
+                logger.error("Error occurred when"
+                    " processing template: [%s]" % resource)
+                raise
+        else:
+            text = resource.source_text
+            text = self.events.begin_text_resource(resource, text) or text
+
+        return self.events.text_resource_complete(
+                                resource, text) or text
 
     def __generate_resource__(self, resource, incremental=False):
         self.refresh_config()
         if not resource.is_processable:
             logger.debug("Skipping [%s]", resource)
             return
-        if incremental and not self.has_resource_changed(resource):
-            logger.debug("No changes found. Skipping resource [%s]", resource)
+        if not in_shard(resource, self.shard):
+            logger.debug("Skipping [%s] from another shard", resource)
             return
+        if incremental:
+            with self.profiler.measure('phase', 'change detection'):
+                changed = self.has_resource_changed(resource)
+            if not changed:
+                logger.debug("No changes found. Skipping resource [%s]",
+                                resource)
+                return
         logger.debug("Processing [%s]", resource)
-        with self.context_for_resource(resource) as context:
+        profiler = self.profiler
+        started = time.time()
+        with profiler.measure('resource', resource.relative_path), \
+             self.context_for_resource(resource) as context:
             target = File(self.site.config.deploy_root_path.child(
                                     resource.relative_deploy_path))
-            target.parent.make()
+            complete = partial(self.__output_complete__,
+                                resource, target, started)
             if resource.simple_copy:
                 logger.debug("Simply Copying [%s]", resource)
-                resource.source_file.copy_to(target)
-            elif resource.source_file.is_text:
-                self.update_deps(resource)
-                if resource.uses_template:
-                    logger.debug("Rendering [%s]", resource)
-                    try:
-                        text = self.template.render_resource(resource,
-                                        context)
-                    except Exception:
-                        logger.error("Error occurred when"
-                            " processing template: [%s]" % resource)
-                        raise
-                else:
-                    text = resource.source_file.read_all()
-                    text = self.events.begin_text_resource(resource, text) or text
-
-                text = self.events.text_resource_complete(
-                                        resource, text) or text
-                target.write(text)
-                copymode(resource.source_file.path, target.path)
+                self.writer.submit(partial(self.__deploy_file__,
+                                    resource.source_file, target,
+                                    self.site.config.deploy_strategy),
+                                   complete)
+            elif resource.is_text:
+                with profiler.measure('phase', 'dependencies'):
+                    self.update_deps(resource)
+                key = None
+                text = None
+                with profiler.measure('phase', 'render'):
+                    if self.site.config.render_cache:
+                        key = self.get_render_key(resource)
+                        if key:
+                            text = self.render_cache.get(key)
+                    if text is None:
+                        text = self.__render_resource__(resource, context)
+                        if key:
+                            self.render_cache.put(key, text)
+                self.writer.submit(partial(self.__write_text__,
+                                    resource, target, text),
+                                   complete)
             else:
                 logger.debug("Copying binary file [%s]", resource)
                 self.events.begin_binary_resource(resource)
-                resource.source_file.copy_to(target)
-                self.events.binary_resource_complete(resource)
\ No newline at end of file
+                deploy = partial(self.__deploy_file__,
+                                    resource.source_file, target,
+                                    self.get_binary_deploy_strategy())
+                if self.binary_hooks_overridden():
+                    # The plugins expect the file to be deployed
+                    # before `binary_resource_complete`.
+                    with profiler.measure('phase', 'write'):
+                        written = deploy()
+                    self.events.binary_resource_complete(resource)
+                    # The plugins may have changed the deployed file.
+                    FS.__invalidate__(target.path)
+                    complete(written)
+                else:
+                    self.writer.submit(deploy, complete)
+                    self.events.binary_resource_complete(resource)
+
+    def __deploy_file__(self, source, target, strategy):
+        target.parent.make()
+        return source.deploy_to(target, strategy)
+
+    def __write_text__(self, resource, target, text):
+        target.parent.make()
+        written = target.write_if_changed(text)
+        if written:
+            copymode(resource.source_file.path, target.path)
+        return written
+
+    def __output_complete__(self, resource, target, started, written):
+        """
+        Records the outcome of writing the output of the given resource,
+        whose generation began at `started`. Called once the write is
+        done, which may be after the next resources have been rendered.
+        """
+        if written:
+            self.changed_outputs.add(resource.relative_deploy_path)
+        elif self.site.config.change_detection != 'hash' and \
+                self.get_change_reason(resource):
+            # The output did not change but is older than one of its
+            # inputs. Remember that it is up to date so that it is not
+            # regenerated again. Inputs changed while it was being
+            # generated are newer than that.
+            self.manifest[resource.relative_deploy_path] = dict(
+                                                verified=started)
+        if self.site.config.change_detection == 'hash':
+            self.update_manifest(resource, target)
@@ -4,7 +4,11 @@ Contains data structures and utilities for hyde.
 """
 from hyde.fs import File, Folder
 
+import atexit
 import codecs
+import hashlib
+import os
+import time
 import yaml
 from datetime import datetime
 from UserDict import IterableUserDict
@@ -119,32 +123,281 @@ class Context(object):
 
         return context
 
-class Dependents(IterableUserDict):
+# The stored dictionaries that have unsaved changes, by id. A single
+# exit handler saves them.
+UNSAVED_STORES = {}
+
+def save_unsaved_stores():
     """
-    Represents the dependency graph for hyde.
+    Saves every stored dictionary that has unsaved changes.
     """
+    for stored in UNSAVED_STORES.values():
+        stored.save()
+
+atexit.register(save_unsaved_stores)
 
-    def __init__(self, sitepath, depends_file_name='.hyde_deps'):
+class StoredDict(IterableUserDict):
+    """
+    A dictionary that is loaded from a store and saved back to it
+    when the process exits. Keeps track of the keys that have changed
+    so that the store writes only those. Only dictionaries with unsaved
+    changes are kept alive until the process exits.
+    """
+
+    def __init__(self, sitepath, namespace, file_name, store=None):
         self.sitepath = Folder(sitepath)
-        self.deps_file = File(self.sitepath.child(depends_file_name))
-        self.data = {}
-        if self.deps_file.exists:
-            self.data = yaml.load(self.deps_file.read_all())
-        import atexit
-        atexit.register(self.save)
+        from hyde.store import Store
+        self.store = Store.load_store(self.sitepath, store,
+                                        namespace, file_name)
+        self.data = self.store.load()
+        self.changed = set()
+        self.removed = set()
+        self.invalidate()
+
+    def __changed__(self):
+        UNSAVED_STORES[id(self)] = self
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Called whenever the data changes.
+        """
+        pass
+
+    def __setitem__(self, key, value):
+        IterableUserDict.__setitem__(self, key, value)
+        self.changed.add(key)
+        self.removed.discard(key)
+        self.__changed__()
+
+    def __delitem__(self, key):
+        IterableUserDict.__delitem__(self, key)
+        self.changed.discard(key)
+        self.removed.add(key)
+        self.__changed__()
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        IterableUserDict.update(self, items)
+        self.changed.update(items)
+        self.removed.difference_update(items)
+        self.__changed__()
+
+    def clear(self):
+        self.removed.update(self.data)
+        self.changed.clear()
+        IterableUserDict.clear(self)
+        self.__changed__()
+
+    @property
+    def dirty(self):
+        """
+        True if anything has changed since the last load or save.
+        """
+        return bool(self.changed or self.removed)
 
     def save(self):
         """
-        Saves the dependency graph (just a dict for now).
+        Writes the changes to the store if there are any.
+        """
+        if not self.dirty:
+            UNSAVED_STORES.pop(id(self), None)
+            return
+        self.store.save(self.data, self.changed, self.removed)
+        self.changed = set()
+        self.removed = set()
+        UNSAVED_STORES.pop(id(self), None)
+
+class Dependents(StoredDict):
+    """
+    Represents the dependency graph for hyde.
+    """
+
+    def __init__(self, sitepath, depends_file_name='.hyde_deps', store=None):
+        StoredDict.__init__(self, sitepath,
+                        'deps', depends_file_name, store)
+
+    def invalidate(self):
+        """
+        Discards the reverse index and the memoized closures. Called
+        whenever the graph changes.
+        """
+        self._reverse = None
+        self._dependencies = {}
+        self._dependents = {}
+
+    @property
+    def reverse(self):
+        """
+        The reverse adjacency index: maps every dependency
+        to the set of paths that directly depend on it.
+        """
+        if self._reverse is None:
+            reverse = {}
+            for path, deps in self.data.iteritems():
+                for dep in deps or []:
+                    if dep:
+                        reverse.setdefault(dep, set()).add(path)
+            self._reverse = reverse
+        return self._reverse
+
+    def __closure__(self, path, edges, memo):
+        if path in memo:
+            return memo[path]
+        closure = set()
+        pending = list(edges(path))
+        while pending:
+            item = pending.pop()
+            if not item or item in closure or item == path:
+                continue
+            closure.add(item)
+            if item in memo:
+                closure.update(memo[item])
+            else:
+                pending.extend(edges(item))
+        closure.discard(path)
+        memo[path] = frozenset(closure)
+        return memo[path]
+
+    def dependencies_of(self, path):
+        """
+        Returns the set of all paths the given path depends on,
+        directly or transitively.
+        """
+        return self.__closure__(path,
+                    lambda item: self.data.get(item, None) or [],
+                    self._dependencies)
+
+    def dependents_of(self, path):
+        """
+        Returns the set of all paths that depend on the given path,
+        directly or transitively. These are the paths that must be
+        regenerated when the given path changes.
+        """
+        return self.__closure__(path,
+                    lambda item: self.reverse.get(item, ()),
+                    self._dependents)
+
+class Manifest(StoredDict):
+    """
+    Holds the checksums of the source, the dependencies and the
+    output of every generated resource, or, when changes are detected
+    by modification time, when an unchanged output was last verified.
+    The entries are keyed by the relative deploy path of the output, as
+    generated resources share the relative path of their source.
+    """
+
+    def __init__(self, sitepath, manifest_file_name='.hyde_manifest',
+                    store=None):
+        StoredDict.__init__(self, sitepath,
+                        'manifest', manifest_file_name, store)
+
+class Outputs(StoredDict):
+    """
+    Maps the path, relative to the deploy folder, of every file written
+    by the last generation to the relative path of the resource it was
+    generated from.
+    """
+
+    def __init__(self, sitepath, outputs_file_name='.hyde_outputs',
+                    store=None):
+        StoredDict.__init__(self, sitepath,
+                        'outputs', outputs_file_name, store)
+
+class FileTypes(StoredDict):
+    """
+    Remembers whether source files are binary by path, size and
+    modification time between generations.
+    """
+
+    def __init__(self, sitepath, file_types_file_name='.hyde_file_types',
+                    store=None):
+        StoredDict.__init__(self, sitepath,
+                        'file_types', file_types_file_name, store)
+
+class Snapshot(StoredDict):
+    """
+    Keeps the parts of the site model that are expensive to rebuild
+    between runs: the listing of every content folder, keyed by the
+    modification time of the folder, and the parsed front matter of
+    every text resource, keyed by the size and modification time of
+    the file. Entries that were modified too close to the time they
+    were recorded are not trusted, as the modification time may not
+    have changed since.
+    """
+
+    settle_time = 2
+
+    def __init__(self, sitepath, snapshot_file_name='.hyde_snapshot',
+                    store='pickle'):
+        StoredDict.__init__(self, sitepath,
+                        'snapshot', snapshot_file_name, store)
+        self.used = set()
+
+    def __lookup__(self, kind, path, key):
+        name = kind + ':' + path
+        self.used.add(name)
+        entry = self.get(name)
+        if entry and entry[0] == key and \
+                entry[0][-1] < entry[1] - self.settle_time:
+            return entry[2]
+        return None
+
+    def __remember__(self, kind, path, key, recorded, value):
+        self[kind + ':' + path] = (key, recorded, value)
+
+    def listing(self, path, read):
+        """
+        Returns the (folder names, file names) listing of the folder at
+        the given path. `read` is called to list the folder if the
+        snapshot does not hold an up to date listing.
         """
-        if self.deps_file.parent.exists:
-            self.deps_file.write(yaml.dump(self.data))
+        key = (os.stat(path).st_mtime,)
+        value = self.__lookup__('listing', path, key)
+        if value is None:
+            recorded = time.time()
+            value = read()
+            self.__remember__('listing', path, key, recorded, value)
+        return value
+
+    def frontmatter(self, path, read):
+        """
+        Returns the front matter of the file at the given path. `read`
+        is called to parse the file if the snapshot does not hold the
+        front matter of its current version.
+        """
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime)
+        value = self.__lookup__('frontmatter', path, key)
+        if value is None:
+            recorded = time.time()
+            value = read()
+            self.__remember__('frontmatter', path, key, recorded, value)
+        return value
+
+    def prune(self, kind):
+        """
+        Removes the entries of the given kind that have not been used
+        since the last prune, such as those of deleted files.
+        """
+        prefix = kind + ':'
+        for name in [name for name in self.data
+                        if name.startswith(prefix) and name not in self.used]:
+            del self[name]
+        self.used = set(name for name in self.used
+                            if not name.startswith(prefix))
 
 class Config(Expando):
     """
     Represents the hyde configuration file
     """
 
+    # Attributes that hold the state of this object
+    # rather than configuration values.
+    internal_attributes = ('default_config', 'config_file', 'config_dict',
+                            'load_time', 'config_files', 'sitepath',
+                            '_checksum', '_modified_times')
+
     def __init__(self, sitepath, config_file=None, config_dict=None):
         self.default_config = dict(
             mode='production',
@@ -156,6 +409,18 @@ class Config(Expando):
             media_url='/media',
             base_url="/",
             not_found='404.html',
+            change_detection='mtime',
+            render_cache=False,
+            store='yaml',
+            source_cache_size=64,
+            deploy_strategy='copy',
+            scan_threads=0,
+            snapshot=False,
+            stat_cache=False,
+            file_types = {
+                "text": [],
+                "binary": []
+            },
             plugins = [],
             ignore = [ "*~", "*.bak", ".hg", ".git", ".svn"],
             meta = {
@@ -167,17 +432,66 @@ class Config(Expando):
         self.load_time = datetime.min
         self.config_files = []
         self.sitepath = Folder(sitepath)
+        self._checksum = None
+        self._modified_times = None
         super(Config, self).__init__(self.load())
 
+    def invalidate(self):
+        """
+        Discards the modification times of the configuration files.
+        They are read once and reused by `needs_refresh` and
+        `last_modified` until this is called. The generator calls this
+        at the start of every generation and the server for every
+        request.
+        """
+        self._modified_times = None
+
+    @property
+    def modified_times(self):
+        """
+        The modification times of the configuration files when they
+        were last checked.
+        """
+        if self._modified_times is None:
+            self._modified_times = [conf.last_modified
+                                        for conf in self.config_files]
+        return self._modified_times
+
     @property
     def last_modified(self):
-        return max((conf.last_modified for conf in self.config_files))
+        return max(self.modified_times)
+
+    @property
+    def checksum(self):
+        """
+        A checksum of the configuration files and the configuration
+        dictionary this object was created from.
+        """
+        if not self._checksum:
+            hasher = hashlib.sha1()
+            for conf in self.config_files:
+                hasher.update(conf.checksum() or '')
+            hasher.update(yaml.dump(self.config_dict))
+            self._checksum = hasher.hexdigest()
+        return self._checksum
+
+    def get_checksum(self, exclude=None):
+        """
+        Returns a checksum of the configuration values leaving out
+        the given top level keys.
+        """
+        exclude = set(exclude or [])
+        exclude.update(self.internal_attributes)
+        values = dict((key, value)
+                        for key, value in self.to_dict().iteritems()
+                            if key not in exclude)
+        return hashlib.sha1(yaml.dump(values)).hexdigest()
 
     def needs_refresh(self):
         if not self.config_files:
             return True
-        return any((conf.has_changed_since(self.load_time)
-                        for conf in self.config_files))
+        return any((modified > self.load_time
+                        for modified in self.modified_times))
 
     def load(self):
         conf = dict(**self.default_config)
@@ -189,6 +503,8 @@ class Config(Expando):
     def reload(self):
         if not self.config_file:
             return
+        self._checksum = None
+        self._modified_times = None
         self.update(self.load())
 
 
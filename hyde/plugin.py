@@ -10,6 +10,7 @@ from hyde.exceptions import HydeException
 from hyde.fs import File
 from hyde.util import getLoggerWithNullHandler, first_match, discover_executable
 from hyde.model import Expando
+from hyde.profiler import Profiler
 
 from functools import partial
 import fnmatch
@@ -21,41 +22,86 @@ import traceback
 
 logger = getLoggerWithNullHandler('hyde.engine')
 
+# Events that are raised for a resource or a node. Plugins only receive
+# them for the files and folders included by their settings.
+FILE_EVENTS = ('begin_text_resource', 'text_resource_complete',
+               'begin_binary_resource', 'binary_resource_complete')
+NODE_EVENTS = ('begin_node', 'node_complete')
+
 class PluginProxy(object):
     """
     A proxy class to raise events in registered  plugins
+
+    The first time an event is raised, the proxy makes a list of the
+    plugins that implement it, with their filters, and calls only those
+    from then on. The lists are made again when `site.plugins` is
+    replaced or `site.plugins_version` changes. Code that changes the
+    list in place must increment `site.plugins_version`.
     """
 
-    def __init__(self, site):
+    # Events that `Plugin` itself handles. They are raised in every plugin.
+    handled_by_plugin = ('template_loaded',)
+
+    def __init__(self, site, profiler=None):
         super(PluginProxy, self).__init__()
         self.site = site
+        self.profiler = profiler or Profiler()
+        self.plugins = None
+        self.version = None
+        self.callers = {}
+
+    def get_dispatch_list(self, method_name):
+        """
+        Returns a (plugin, method, filter, profiler name) tuple for every
+        plugin that handles the given event. The filter is None for
+        events that every plugin receives.
+        """
+        dispatch = []
+        for plugin in self.site.plugins or []:
+            if not (method_name in self.handled_by_plugin or
+                        plugin.overrides(method_name)):
+                continue
+            dispatch.append((plugin,
+                             getattr(plugin, method_name),
+                             plugin.get_filter(method_name),
+                             '%s.%s' % (plugin.__class__.__name__,
+                                        method_name)))
+        return dispatch
 
     def __getattr__(self, method_name):
-        if hasattr(Plugin, method_name):
-            def __call_plugins__(*args):
-                # logger.debug("Calling plugin method [%s]", method_name)
-                res = None
-                if self.site.plugins:
-                    for plugin in self.site.plugins:
-                        if hasattr(plugin, method_name):
-                            # logger.debug(
-                            #    "\tCalling plugin [%s]",
-                            #   plugin.__class__.__name__)
-                            checker = getattr(plugin, 'should_call__' + method_name)
-                            if checker(*args):
-                                function = getattr(plugin, method_name)
-                                res = function(*args)
-                                targs = list(args)
-                                if len(targs):
-                                    last = targs.pop()
-                                    res = res if res else last
-                                    targs.append(res)
-                                    args = tuple(targs)
-                return res
-
-            return __call_plugins__
-        raise HydeException(
+        if not hasattr(Plugin, method_name):
+            raise HydeException(
                 "Unknown plugin method [%s] called." % method_name)
+        site = self.site
+        if self.plugins is not site.plugins or \
+           self.version != site.plugins_version:
+            self.plugins = site.plugins
+            self.version = site.plugins_version
+            self.callers = {}
+        try:
+            return self.callers[method_name]
+        except KeyError:
+            pass
+        dispatch = self.get_dispatch_list(method_name)
+        profiler = self.profiler
+
+        def __call_plugins__(*args):
+            res = None
+            for (plugin, function, checker, name) in dispatch:
+                if checker is not None and not checker(*args):
+                    continue
+                if profiler.enabled:
+                    with profiler.measure('plugin', name):
+                        res = function(*args)
+                else:
+                    res = function(*args)
+                if args:
+                    res = res if res else args[-1]
+                    args = args[:-1] + (res,)
+            return res
+
+        self.callers[method_name] = __call_plugins__
+        return __call_plugins__
 
 class Plugin(object):
     """
@@ -97,18 +143,37 @@ class Plugin(object):
                 result = partial(self.template.get_open_tag, tag)
         elif name.startswith('should_call__'):
             (_, _, method) = name.rpartition('__')
-            if (method in ('begin_text_resource', 'text_resource_complete',
-                            'begin_binary_resource', 'binary_resource_complete')):
-                result = self._file_filter
-            elif (method in ('begin_node', 'node_complete')):
-                result = self._dir_filter
-            else:
+            result = self.get_filter(method)
+            if not result:
                 def always_true(*args, **kwargs):
                     return True
                 result = always_true
 
         return  result if result else super(Plugin, self).__getattribute__(name)
 
+    def get_filter(self, method):
+        """
+        Returns the function that decides whether this plugin receives
+        the given event for its arguments, or None if it receives every
+        call.
+        """
+        if method in FILE_EVENTS:
+            return self._file_filter
+        elif method in NODE_EVENTS:
+            return self._dir_filter
+        return None
+
+    def overrides(self, method):
+        """
+        Returns True if this plugin replaces the implementation of the
+        given event in `Plugin`.
+        """
+        if method in self.__dict__:
+            return True
+        implementation = getattr(self.__class__, method, None)
+        return getattr(implementation, 'im_func', None) is not \
+                    getattr(Plugin, method).im_func
+
     @property
     def settings(self):
         """
@@ -265,13 +330,14 @@ class Plugin(object):
         """
         site.plugins = [loader.load_python_object(name)(site)
                             for name in site.config.plugins]
+        site.plugins_version += 1
 
     @staticmethod
-    def get_proxy(site):
+    def get_proxy(site, profiler=None):
         """
         Returns a new instance of the Plugin proxy.
         """
-        return PluginProxy(site)
+        return PluginProxy(site, profiler)
 
 class CLTransformer(Plugin):
     """
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Measures where the time of a generation is spent.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from hyde.fs import File
+
+from hyde.util import getLoggerWithNullHandler
+logger = getLoggerWithNullHandler('hyde.engine')
+
+def cpu_time():
+    """
+    Returns the processor time used by this process and by the child
+    processes it has waited for (command line plugins).
+    """
+    times = os.times()
+    return times[0] + times[1] + times[2] + times[3]
+
+class Profiler(object):
+    """
+    Accumulates wall clock and processor time per category and name.
+    The categories used by the generator are `phase` (load, begin_site,
+    render, write...), `resource` (relative path) and `plugin`
+    (plugin class and hook).
+
+    A disabled profiler does not measure anything.
+    """
+
+    def __init__(self, enabled=False):
+        super(Profiler, self).__init__()
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all measurements.
+        """
+        self.records = {}
+
+    @contextmanager
+    def measure(self, category, name):
+        """
+        Measures the time spent in the body of the `with` statement
+        and adds it to the given category and name.
+        """
+        if not self.enabled:
+            yield
+            return
+        (wall, cpu) = (time.time(), cpu_time())
+        try:
+            yield
+        finally:
+            self.add(category, name,
+                     time.time() - wall, cpu_time() - cpu)
+
+    def add(self, category, name, wall, cpu, count=1):
+        """
+        Adds a measurement.
+        """
+        record = self.records.setdefault((category, name), [0, 0.0, 0.0])
+        record[0] += count
+        record[1] += wall
+        record[2] += cpu
+
+    def merge(self, records):
+        """
+        Adds the measurements of another profiler, for example one
+        that ran in a worker process.
+        """
+        for (category, name), (count, wall, cpu) in records.iteritems():
+            self.add(category, name, wall, cpu, count)
+
+    def report(self, sort_by='wall'):
+        """
+        Returns the measurements as a list of dictionaries sorted
+        by the given key in descending order.
+        """
+        report = [dict(category=category, name=name,
+                       count=count, wall=wall, cpu=cpu)
+                    for (category, name), (count, wall, cpu)
+                        in self.records.iteritems()]
+        report.sort(key=lambda record: record[sort_by], reverse=True)
+        return report
+
+    def save(self, path):
+        """
+        Writes the report as JSON to the given path.
+        """
+        File(path).write(unicode(json.dumps(
+            dict(records=self.report()), indent=2)))
+
+    def summary(self, top=10):
+        """
+        Returns lines that list the `top` most expensive
+        entries of every category.
+        """
+        lines = []
+        report = self.report()
+        categories = sorted(set(record['category'] for record in report))
+        for category in categories:
+            records = [record for record in report
+                            if record['category'] == category]
+            lines.append("Top [%d] of [%d] %s entries by wall time:" %
+                            (min(top, len(records)), len(records), category))
+            for record in records[:top]:
+                lines.append("  %9.3fs wall %9.3fs cpu %6d calls  %s" %
+                        (record['wall'], record['cpu'],
+                         record['count'], record['name']))
+        return lines
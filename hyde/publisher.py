@@ -1,6 +1,7 @@
 import abc
 from operator import attrgetter
 
+from hyde.fs import FS
 from hyde.util import getLoggerWithNullHandler
 from hyde.loader import load_python_object
 
@@ -31,6 +32,8 @@ class Publisher(object):
     def publish(self):
         if not self.site.config.deploy_root_path.exists:
             raise Exception("Please generate the site first")
+        if self.site.config.stat_cache:
+            FS.use_stat_cache()
 
     @staticmethod
     def load_publisher(site, publisher, message):
@@ -12,7 +12,7 @@ import traceback
 from datetime import datetime
 from SimpleHTTPServer import SimpleHTTPRequestHandler
 from BaseHTTPServer import HTTPServer
-from hyde.fs import File, Folder
+from hyde.fs import File, Folder, FS
 from hyde.site import Site
 from hyde.generator import Generator
 from hyde.exceptions import HydeException
@@ -34,6 +34,8 @@ class HydeRequestHandler(SimpleHTTPRequestHandler):
         and serve.
         """
         self.server.request_time = datetime.now()
+        self.server.site.config.invalidate()
+        FS.__invalidate__()
         logger.debug("Processing request: [%s]" % self.path)
         result = urlparse.urlparse(self.path)
         query = urlparse.parse_qs(result.query)
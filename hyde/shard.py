@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Splits the generation of a site across machines.
+
+Every shard loads the whole site and fires `begin_site`, so the indexes
+built by plugins (tags, sorters, groupers...) are the same on every
+shard, but renders only the resources whose relative path hashes to it.
+Each shard records what it generated in a shard manifest next to its
+deploy folder, so that the manifest is never published. `merge_shards`
+combines the deploy folders, the dependency data and the output records
+of all the shards.
+"""
+import glob
+import hashlib
+import os
+import re
+
+import yaml
+
+from hyde.exceptions import HydeException
+from hyde.fs import File, Folder
+from hyde.util import getLoggerWithNullHandler
+
+logger = getLoggerWithNullHandler('hyde.engine')
+
+SHARD_MANIFEST = '.hyde_shard_%d_of_%d.yaml'
+
+def parse_shard(value):
+    """
+    Parses a shard specification of the form `K/N` (1 <= K <= N)
+    into a (K, N) tuple.
+    """
+    match = re.match(r'^\s*(\d+)\s*/\s*(\d+)\s*$', value or '')
+    if not match:
+        raise HydeException(
+            "Invalid shard [%s]. Expected K/N, for example 1/4." % value)
+    (index, count) = (int(match.group(1)), int(match.group(2)))
+    if not 1 <= index <= count:
+        raise HydeException(
+            "Invalid shard [%s]. K must be between 1 and N." % value)
+    return (index, count)
+
+def shard_of(relative_path, count):
+    """
+    Returns the shard (1 to `count`) that the resource with the given
+    relative path belongs to. The assignment depends only on the path,
+    so it is the same on every machine.
+    """
+    path = relative_path.replace(os.sep, '/').encode('utf-8')
+    return int(hashlib.md5(path).hexdigest(), 16) % count + 1
+
+def in_shard(resource, shard):
+    """
+    Returns True if the given resource belongs to the given (K, N) shard.
+    A shard of None includes every resource.
+    """
+    if not shard:
+        return True
+    (index, count) = shard
+    return shard_of(resource.relative_path, count) == index
+
+def shard_manifest(folder, shard):
+    """
+    Returns the manifest file of the given (K, N) shard for the given
+    deploy folder. The manifest sits next to the folder.
+    """
+    folder = Folder(folder)
+    return File(folder.parent.child(folder.name + SHARD_MANIFEST % shard))
+
+def write_shard_manifest(gen, shard):
+    """
+    Writes the manifest of the given shard next to the deploy folder:
+    the outputs it owns, with the resources they were generated from,
+    and the dependency and manifest entries of its resources.
+    """
+    (index, count) = shard
+    resources = [resource
+                    for resource in gen.site.content.walk_resources()
+                        if resource.is_processable and
+                            in_shard(resource, shard)]
+    paths = [resource.relative_path for resource in resources]
+    outputs = dict((resource.relative_deploy_path, resource.relative_path)
+                        for resource in resources)
+    data = dict(
+        shard=index,
+        shards=count,
+        outputs=outputs,
+        deps=dict((path, gen.deps[path])
+                        for path in paths if path in gen.deps),
+        manifest=dict((path, gen.manifest[path])
+                        for path in outputs if path in gen.manifest))
+    manifest = shard_manifest(gen.site.config.deploy_root_path, shard)
+    manifest.write(unicode(yaml.dump(data)))
+    logger.info("Shard [%d/%d] generated [%d] of the resources" %
+                    (index, count, len(resources)))
+    return manifest
+
+def read_shard_manifests(folders):
+    """
+    Finds and reads the shard manifests of the given folders. Returns a
+    list of (folder, manifest data) tuples.
+    """
+    manifests = []
+    for folder in folders:
+        folder = Folder(folder)
+        pattern = folder.parent.child(
+                    folder.name + SHARD_MANIFEST.replace('%d', '*'))
+        for path in sorted(glob.glob(pattern)):
+            data = yaml.load(File(path).read_all())
+            manifests.append((folder, data))
+    return manifests
+
+def merge_shards(site, folders, deps, manifest, outputs=None):
+    """
+    Copies the outputs of every shard from the given folders to the
+    deploy folder of the site and merges the dependency and manifest
+    entries of the shards into `deps` and `manifest`. If `outputs` (a
+    `hyde.model.Outputs`) is given, the merged outputs are recorded in
+    it. Fails if a shard is missing or the shards disagree on their
+    number.
+    """
+    manifests = read_shard_manifests(folders)
+    if not manifests:
+        raise HydeException(
+            "No shard manifests found in [%s]" % ', '.join(folders))
+    counts = set(data['shards'] for (_, data) in manifests)
+    if len(counts) != 1:
+        raise HydeException(
+            "The shards were generated with different shard counts: %s" %
+                sorted(counts))
+    count = counts.pop()
+    found = set(data['shard'] for (_, data) in manifests)
+    missing = sorted(set(range(1, count + 1)) - found)
+    if missing:
+        raise HydeException("Missing shards: %s of [%d]" %
+                                (', '.join(map(str, missing)), count))
+
+    deploy_root = site.config.deploy_root_path
+    copied = 0
+    for (folder, data) in manifests:
+        for path, relative_path in sorted(data['outputs'].iteritems()):
+            source = File(folder.child(path))
+            target = File(deploy_root.child(path))
+            if outputs is not None and \
+                    outputs.get(path) != relative_path:
+                outputs[path] = relative_path
+            if source.path == target.path:
+                continue
+            target.parent.make()
+            if source.deploy_to(target):
+                copied += 1
+        deps.update(data.get('deps') or {})
+        manifest.update(data.get('manifest') or {})
+    logger.info("Merged [%d] shards, [%d] files copied" % (count, copied))
+    return manifests
@@ -3,38 +3,80 @@
 Parses & holds information about the site to be generated.
 """
 import os
-import fnmatch
 import sys
 import urlparse
 from functools import wraps
 from urllib import quote
 
+from hyde.cache import SourceCache
 from hyde.exceptions import HydeException
-from hyde.fs import FS, File, Folder
-from hyde.model import Config
+from hyde.fs import BinaryClassifier, File, Folder, compile_globs
+from hyde.model import Config, Snapshot
 from hyde.util import getLoggerWithNullHandler
 
 
+def normalize_path(path):
+    """
+    Normalizes the given path the way `File` and `Folder` do, without
+    creating them.
+    """
+    path = unicode(path).replace('/', os.sep).strip().rstrip(os.sep)
+    if '~' in path or '$' in path:
+        path = os.path.expandvars(os.path.expanduser(path))
+    return path
+
 def path_normalized(f):
     @wraps(f)
     def wrapper(self, path):
-        return f(self, unicode(path).replace('/', os.sep))
+        return f(self, normalize_path(path))
     return wrapper
 
 logger = getLoggerWithNullHandler('hyde.engine')
 
+_interned_paths = {}
+
+def intern_path(path):
+    """
+    Returns the shared copy of the given path string. The names and
+    relative paths of nodes and resources repeat across large sites.
+    """
+    return _interned_paths.setdefault(path, path)
+
 class Processable(object):
     """
     A node or resource.
+
+    The core attributes of nodes and resources are kept in slots, as
+    are the attributes that the bundled plugins add to most of them
+    (`meta`, `depends`, `tags` and `page`). Plugins may still add
+    attributes of their own; an instance dictionary is only created for
+    the instances that get one. Attributes that most instances share
+    should be declared with `register_attribute`.
     """
 
-    def __init__(self, source):
+    __slots__ = ('_relative_deploy_path', 'is_processable', 'uses_template',
+                 '__dict__', '__weakref__')
+
+    extension_attributes = {}
+
+    def __init__(self):
         super(Processable, self).__init__()
-        self.source = FS.file_or_folder(source)
         self.is_processable = True
         self.uses_template = True
         self._relative_deploy_path = None
 
+    @classmethod
+    def register_attribute(cls, name, default=None):
+        """
+        Declares an attribute that plugins add to nodes or resources.
+        The default is stored on the class, so only the instances that
+        have a value of their own carry the attribute. The default is
+        shared by all instances and should not be mutated.
+        """
+        cls.extension_attributes = dict(cls.extension_attributes)
+        cls.extension_attributes[name] = default
+        setattr(cls, name, default)
+
     @property
     def name(self):
         """
@@ -51,7 +93,7 @@ class Processable(object):
         Gets the source path of this node.
         """
         return self.source.path
-        
+
     def get_relative_deploy_path(self):
         """
         Gets the path where the file will be created
@@ -88,28 +130,94 @@ class Processable(object):
 
 class Resource(Processable):
     """
-    Represents any file that is processed by hyde
+    Represents any file that is processed by hyde.
+
+    Only the source path is kept until `source_file` is first accessed;
+    the `File` object is then created and kept.
     """
 
+    __slots__ = ('node', '_path', '_source_file', '_relative_path',
+                 'simple_copy', 'meta', 'depends', 'tags', 'page')
+
     def __init__(self, source_file, node):
-        super(Resource, self).__init__(source_file)
-        self.source_file = source_file
+        super(Resource, self).__init__()
         if not node:
             raise HydeException("Resource cannot exist without a node")
         if not source_file:
             raise HydeException("Source file is required"
                                 " to instantiate a resource")
+        self._path = unicode(File(source_file))
+        self._source_file = None
+        self._relative_path = None
         self.node = node
-        self.site = node.site
         self.simple_copy = False
 
+    @property
+    def source_file(self):
+        """
+        The source file of this resource.
+        """
+        if self._source_file is None:
+            self._source_file = File(self._path)
+        return self._source_file
+
+    source = source_file
+
+    @property
+    def site(self):
+        """
+        The site this resource belongs to.
+        """
+        return self.node.site
+
+    @property
+    def path(self):
+        """
+        Gets the source path of this resource.
+        """
+        return self._path
+
+    @property
+    def name(self):
+        """
+        The resource name
+        """
+        return os.path.basename(self._path)
+
     @property
     def relative_path(self):
         """
         Gets the path relative to the root folder (Content)
         """
-        return self.source_file.get_relative_path(self.node.root.source_folder)
-    
+        if self._relative_path is None:
+            self._relative_path = intern_path(
+                    self.source_file.get_relative_path(
+                                    self.node.root.source_folder))
+        return self._relative_path
+
+    @property
+    def source_text(self):
+        """
+        The text of the source file. Read through the source cache
+        of the site so that the file is read only once per generation.
+        """
+        return self.site.source_cache.read(self.source_file)
+
+    @property
+    def is_binary(self):
+        """
+        True if the source file is binary, as decided by the classifier
+        of the site.
+        """
+        return self.site.classifier.is_binary(self.source_file)
+
+    @property
+    def is_text(self):
+        """
+        True if the source file is text.
+        """
+        return not self.is_binary
+
     @property
     def slug(self):
         #TODO: Add a more sophisticated slugify method
@@ -120,8 +228,11 @@ class Node(Processable):
     Represents any folder that is processed by hyde
     """
 
+    __slots__ = ('root', 'module', 'site', 'source_folder', 'parent',
+                 'child_nodes', 'resources', '_relative_path', 'meta')
+
     def __init__(self, source_folder, parent=None):
-        super(Node, self).__init__(source_folder)
+        super(Node, self).__init__()
         if not source_folder:
             raise HydeException("Source folder is required"
                                 " to instantiate a node.")
@@ -129,6 +240,7 @@ class Node(Processable):
         self.module = None
         self.site = None
         self.source_folder = Folder(unicode(source_folder))
+        self._relative_path = None
         self.parent = parent
         if parent:
             self.root = self.parent.root
@@ -137,6 +249,13 @@ class Node(Processable):
         self.child_nodes = []
         self.resources = []
 
+    @property
+    def source(self):
+        """
+        The source folder of this node.
+        """
+        return self.source_folder
+
     def contains_resource(self, resource_name):
         """
         Returns True if the given resource name exists as a file
@@ -205,13 +324,24 @@ class Node(Processable):
         """
         Gets the path relative to the root folder (Content, Media, Layout)
         """
-        return self.source_folder.get_relative_path(self.root.source_folder)
+        if self._relative_path is None:
+            self._relative_path = intern_path(
+                    self.source_folder.get_relative_path(
+                                    self.root.source_folder))
+        return self._relative_path
 
 class RootNode(Node):
     """
     Represents one of the roots of site: Content, Media or Layout
+
+    Nodes and resources are indexed by their normalized relative path,
+    so that lookups by absolute, relative or deploy path are resolved
+    with string operations alone.
     """
 
+    __slots__ = ('node_map', 'node_deploy_map',
+                 'resource_map', 'resource_deploy_map')
+
     def __init__(self, source_folder, site):
         super(RootNode, self).__init__(source_folder)
         self.site = site
@@ -220,15 +350,38 @@ class RootNode(Node):
         self.resource_map = {}
         self.resource_deploy_map = {}
 
+    def relative_key(self, path):
+        """
+        Returns the path relative to this root for the given normalized
+        absolute path. Returns None if the path is outside the root.
+        """
+        root = self.source_folder.path
+        if path == root:
+            return u''
+        if path.startswith(root) and path[len(root)] == os.sep:
+            return path[len(root) + 1:]
+        return None
+
+    def relative_path_key(self, path):
+        """
+        Returns the key for the given normalized relative path. Absolute
+        paths are accepted too and made relative to this root, as they
+        were when relative paths were joined to the root folder.
+        """
+        if os.path.isabs(path):
+            return self.relative_key(path)
+        return path
+
     @path_normalized
     def node_from_path(self, path):
         """
         Gets the node that maps to the given path.
         If no match is found it returns None.
         """
-        if Folder(path) == self.source_folder:
-            return self
-        return self.node_map.get(unicode(Folder(path)), None)
+        key = self.relative_key(path)
+        if key is None:
+            return None
+        return self.node_map.get(key, None) if key else self
 
     @path_normalized
     def node_from_relative_path(self, relative_path):
@@ -236,8 +389,10 @@ class RootNode(Node):
         Gets the content node that maps to the given relative path.
         If no match is found it returns None.
         """
-        return self.node_from_path(
-                    self.source_folder.child(unicode(relative_path)))
+        key = self.relative_path_key(relative_path)
+        if key is None:
+            return None
+        return self.node_map.get(key, None) if key else self
 
     @path_normalized
     def resource_from_path(self, path):
@@ -245,7 +400,10 @@ class RootNode(Node):
         Gets the resource that maps to the given path.
         If no match is found it returns None.
         """
-        return self.resource_map.get(unicode(File(path)), None)
+        key = self.relative_key(path)
+        if not key:
+            return None
+        return self.resource_map.get(key, None)
 
     @path_normalized
     def resource_from_relative_path(self, relative_path):
@@ -253,15 +411,16 @@ class RootNode(Node):
         Gets the content resource that maps to the given relative path.
         If no match is found it returns None.
         """
-        return self.resource_from_path(
-                    self.source_folder.child(relative_path))
+        return self.resource_map.get(
+                    self.relative_path_key(relative_path), None)
 
     def deploy_path_changed(self, item):
         """
         Handles the case where the relative deploy path of a
         resource has changed.
         """
-        self.resource_deploy_map[unicode(item.relative_deploy_path)] = item
+        self.resource_deploy_map[
+                normalize_path(item.relative_deploy_path)] = item
 
     @path_normalized
     def resource_from_relative_deploy_path(self, relative_deploy_path):
@@ -271,7 +430,8 @@ class RootNode(Node):
         """
         if relative_deploy_path in self.resource_deploy_map:
             return self.resource_deploy_map[relative_deploy_path]
-        return self.resource_from_relative_path(relative_deploy_path)
+        return self.resource_map.get(
+                    self.relative_path_key(relative_deploy_path), None)
 
     def add_node(self, a_folder):
         """
@@ -280,31 +440,29 @@ class RootNode(Node):
         for quick lookup.
         """
         folder = Folder(a_folder)
-        node = self.node_from_path(folder)
-        if node:
-            logger.debug("Node exists at [%s]" % node.relative_path)
-            return node
-
-        if not folder.is_descendant_of(self.source_folder):
+        key = self.relative_key(folder.path)
+        if key is None:
             raise HydeException("The given folder [%s] does not"
                                 " belong to this hierarchy [%s]" %
                                 (folder, self.source_folder))
+        node = self.node_map.get(key, None) if key else self
+        if node:
+            logger.debug("Node exists at [%s]" % node.relative_path)
+            return node
 
-        p_folder = folder
-        parent = None
-        hierarchy = []
-        while not parent:
-            hierarchy.append(p_folder)
-            p_folder = p_folder.parent
-            parent = self.node_from_path(p_folder)
-
-        hierarchy.reverse()
-        node = parent if parent else self
-        for h_folder in hierarchy:
-            node = node.add_child_node(h_folder)
-            self.node_map[unicode(h_folder)] = node
-            logger.debug("Added node [%s] to [%s]" % (
-                            node.relative_path, self.source_folder))
+        node = self
+        parts = key.split(os.sep)
+        for index, name in enumerate(parts):
+            node_key = os.sep.join(parts[:index + 1])
+            child = self.node_map.get(node_key, None)
+            if not child:
+                child = node.add_child_node(
+                            Folder(node.source_folder.child(name)))
+                child._relative_path = intern_path(node_key)
+                self.node_map[child._relative_path] = child
+                logger.debug("Added node [%s] to [%s]" % (
+                                child.relative_path, self.source_folder))
+            node = child
 
         return node
 
@@ -315,27 +473,27 @@ class RootNode(Node):
         """
 
         afile = File(a_file)
-
-        resource = self.resource_from_path(afile)
-        if resource:
-            logger.debug("Resource exists at [%s]" % resource.relative_path)
-            return resource
-
-        if not afile.is_descendant_of(self.source_folder):
+        key = self.relative_key(afile.path)
+        if not key:
             raise HydeException("The given file [%s] does not reside"
                                 " in this hierarchy [%s]" %
                                 (afile, self.source_folder))
 
-        node = self.node_from_path(afile.parent)
+        resource = self.resource_map.get(key, None)
+        if resource:
+            logger.debug("Resource exists at [%s]" % resource.relative_path)
+            return resource
 
+        node_key = os.path.dirname(key)
+        node = self.node_map.get(node_key, None) if node_key else self
         if not node:
             node = self.add_node(afile.parent)
         resource = node.add_child_resource(afile)
-        self.resource_map[unicode(afile)] = resource
-        relative_path = resource.relative_path
-        resource.simple_copy = any(fnmatch.fnmatch(relative_path, pattern)
-                                        for pattern
-                                        in self.site.config.simple_copy)
+        resource._relative_path = intern_path(key)
+        self.resource_map[resource._relative_path] = resource
+        simple_copy = compile_globs(self.site.config.simple_copy)
+        resource.simple_copy = bool(simple_copy and simple_copy.match(
+                                os.path.normcase(resource.relative_path)))
 
         logger.debug("Added resource [%s] to [%s]" %
                     (resource.relative_path, self.source_folder))
@@ -352,26 +510,17 @@ class RootNode(Node):
             raise HydeException("The given source folder [%s]"
                                 " does not exist" % self.source_folder)
 
-        with self.source_folder.walker as walker:
-
-            def dont_ignore(name):
-                for pattern in self.site.config.ignore:
-                    if fnmatch.fnmatch(name, pattern):
-                        return False
-                return True
-
-            @walker.folder_visitor
-            def visit_folder(folder):
-                if dont_ignore(folder.name):
-                    self.add_node(folder)
-                else:
-                    logger.debug("Ignoring node: %s" % folder.name)
-                    return False
-
-            @walker.file_visitor
-            def visit_file(afile):
-                if dont_ignore(afile.name):
-                    self.add_resource(afile)
+        snapshot = self.site.snapshot
+        scanner = self.source_folder.get_scanner(
+                            ignore=self.site.config.ignore,
+                            threads=self.site.config.scan_threads,
+                            snapshot=snapshot)
+        for path, names in scanner.scan():
+            self.add_node(path)
+            for name in names:
+                self.add_resource(os.path.join(path, name))
+        if snapshot is not None:
+            snapshot.prune('listing')
 
 class Site(object):
     """
@@ -388,7 +537,17 @@ class Site(object):
         self.config = config if config else Config(self.sitepath)
         self.content = RootNode(self.config.content_root_path, self)
         self.plugins = []
+        # Incremented whenever `plugins` changes.
+        self.plugins_version = 0
         self.context = {}
+        self.source_cache = SourceCache(
+                    self.config.source_cache_size * 1024 * 1024)
+        self.snapshot = Snapshot(self.sitepath) \
+                            if self.config.snapshot else None
+        file_types = self.config.file_types
+        self.classifier = BinaryClassifier(
+                    text_extensions=getattr(file_types, 'text', None),
+                    binary_extensions=getattr(file_types, 'binary', None))
 
     def refresh_config(self):
         """
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Contains the storage protocol for data that hyde keeps between
+generations (the dependency graph, the manifest) and the default
+YAML backed implementation.
+"""
+import abc
+import cPickle as pickle
+import os
+
+import yaml
+
+from hyde.fs import File, Folder
+from hyde.loader import load_python_object
+from hyde.util import getLoggerWithNullHandler
+
+logger = getLoggerWithNullHandler('hyde.engine')
+
+STORES = {
+    'yaml': 'hyde.store.YAMLStore',
+    'pickle': 'hyde.store.PickleStore',
+    'sqlite': 'hyde.ext.stores.sqlite.SQLiteStore'
+}
+
+class Store(object):
+    """
+    The abstract base class for stores. A store holds a dictionary
+    for every namespace. Keys are strings and values are anything
+    that can be represented in YAML.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self, sitepath, namespace, file_name):
+        super(Store, self).__init__()
+        self.sitepath = Folder(sitepath)
+        self.namespace = namespace
+        self.file_name = file_name
+
+    @abc.abstractmethod
+    def load(self):
+        """
+        Returns the dictionary stored for this namespace.
+        """
+        return {}
+
+    @abc.abstractmethod
+    def save(self, data, changed, removed):
+        """
+        Persists the given data. `changed` contains the keys that have
+        been added or modified and `removed` the keys that have been
+        deleted since the last load or save.
+        """
+        pass
+
+    @staticmethod
+    def load_store(sitepath, store, namespace, file_name):
+        """
+        Creates the store with the given name. The name is either one of
+        the built in stores (`yaml`, `sqlite`) or the fully qualified
+        name of a `Store` class.
+        """
+        store = store or 'yaml'
+        store_class = load_python_object(STORES.get(store, store))
+        return store_class(sitepath, namespace, file_name)
+
+
+class YAMLStore(Store):
+    """
+    Stores every namespace in its own YAML file in the site folder.
+    The file is rewritten only if something has changed.
+    """
+
+    def __init__(self, sitepath, namespace, file_name):
+        super(YAMLStore, self).__init__(sitepath, namespace, file_name)
+        self.store_file = File(self.sitepath.child(file_name))
+
+    def load(self):
+        if not self.store_file.exists:
+            return {}
+        return yaml.load(self.store_file.read_all()) or {}
+
+    def save(self, data, changed, removed):
+        if not (changed or removed):
+            return
+        if not self.store_file.parent.exists:
+            return
+        temp = File(self.store_file.path + '.%d.tmp' % os.getpid())
+        temp.write(yaml.dump(dict(data)))
+        os.rename(temp.path, self.store_file.path)
+
+
+class PickleStore(Store):
+    """
+    Stores every namespace in its own pickle file in the site folder.
+    Loads much faster than YAML, which matters for large namespaces
+    such as the site snapshot. A file that cannot be read is treated
+    as empty.
+    """
+
+    def __init__(self, sitepath, namespace, file_name):
+        super(PickleStore, self).__init__(sitepath, namespace, file_name)
+        self.store_file = File(self.sitepath.child(file_name))
+
+    def load(self):
+        if not self.store_file.exists:
+            return {}
+        try:
+            with open(self.store_file.path, 'rb') as stream:
+                return pickle.load(stream) or {}
+        except Exception, error:
+            logger.warning("Ignoring unreadable store [%s]: %s" %
+                                (self.store_file, error))
+            return {}
+
+    def save(self, data, changed, removed):
+        if not (changed or removed):
+            return
+        if not self.store_file.parent.exists:
+            return
+        temp = File(self.store_file.path + '.%d.tmp' % os.getpid())
+        with open(temp.path, 'wb') as stream:
+            pickle.dump(dict(data), stream, pickle.HIGHEST_PROTOCOL)
+        os.rename(temp.path, self.store_file.path)
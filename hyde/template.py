@@ -73,6 +73,13 @@ class Template(object):
         """
         return
 
+    def use_private_caches(self):
+        """
+        Called in worker processes of a parallel generation. Caches
+        that are shared on disk must not be written to from here.
+        """
+        return
+
     def get_dependencies(self, text):
         """
         Finds the dependencies based on the included
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Use nose
+`$ pip install nose`
+`$ nosetests`
+"""
+from hyde.ext.publishers.dvcs import Git
+from hyde.fs import File, Folder
+from hyde.model import Config, Expando
+from hyde.site import Site
+
+from mock import patch
+
+TEST_SITE = File(__file__).parent.parent.child_folder('_test')
+
+
+class TestGit(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+        self.site = Site(TEST_SITE, Config(TEST_SITE, config_dict={}))
+        self.deploy = self.site.config.deploy_root_path
+        self.repo = TEST_SITE.child_folder('repo')
+        for path in ['index.html', 'blog/post.html']:
+            target = File(self.deploy.child(path))
+            target.parent.make()
+            target.write(path)
+        for path in ['.git/HEAD', 'old/page.html', 'index.html']:
+            target = File(self.repo.child(path))
+            target.parent.make()
+            target.write('old')
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def publish(self, **settings):
+        settings.update(type='hyde.ext.publishers.dvcs.Git',
+                        path='repo', url='git@example.com:site.git')
+        with patch.object(Git, 'switch'), patch.object(Git, 'add') as add, \
+             patch.object(Git, 'commit'), patch.object(Git, 'push') as push:
+            Git(self.site, Expando(settings), 'Publish').publish()
+            return (add.called, push.called)
+
+    def test_publish_mirrors_the_deploy_folder(self):
+        assert self.publish(delete=True) == (True, True)
+        assert File(self.repo.child('index.html')).read_all() == 'index.html'
+        assert File(self.repo.child('blog/post.html')).exists
+        assert not Folder(self.repo.child('old')).exists
+        assert File(self.repo.child('.git/HEAD')).read_all() == 'old'
+
+    def test_publish_keeps_extra_files_by_default(self):
+        self.publish()
+        assert File(self.repo.child('old/page.html')).exists
+
+    def test_publish_skips_the_commit_without_changes(self):
+        self.publish()
+        assert self.publish() == (False, True)
@@ -6,6 +6,7 @@ Use nose
 
 Requires PIL
 """
+from hyde.ext.plugins.images import ImageSizerPlugin
 from hyde.fs import File, Folder
 from hyde.generator import Generator
 from hyde.site import Site
@@ -55,6 +56,13 @@ class TestImageSizer(object):
         assert ' width="%d"' % IMAGE_SIZE[0] in html
         assert ' height="%d"' % IMAGE_SIZE[1] in html
 
+    def test_size_image_in_media_root(self):
+        self.site.load()
+        plugin = ImageSizerPlugin(self.site)
+        src = self.site.media_url('img/%s' % IMAGE_NAME)
+        assert plugin._handle_img(None, src, None, None) == \
+                        'height="%d" width="%d" ' % IMAGE_SIZE[::-1]
+
     def test_size_image_relative(self):
         text = u"""
 <img src="media/img/%s">
@@ -4,7 +4,7 @@ Use nose
 `$ pip install nose`
 `$ nosetests`
 """
-from hyde.ext.plugins.meta import MetaPlugin
+from hyde.ext.plugins.meta import Metadata, MetaPlugin
 from hyde.fs import File, Folder
 from hyde.generator import Generator
 from hyde.site import Site
@@ -16,6 +16,24 @@ import yaml
 TEST_SITE = File(__file__).parent.parent.child_folder('_test')
 
 
+def test_metadata_inherits_without_copying():
+    site_meta = Metadata(dict(author='hyde', nested=dict(a=1)))
+    node_meta = Metadata(dict(title='node'), site_meta)
+    meta = Metadata('title: page', node_meta)
+    assert not 'author' in meta.__dict__
+    assert meta.author == 'hyde'
+    assert meta.nested.a == 1
+    assert meta.title == 'page'
+    assert meta.get('author') == 'hyde'
+    assert meta.get('missing', 'default') == 'default'
+    assert not hasattr(meta, 'missing')
+    assert meta.to_dict() == dict(author='hyde', nested=dict(a=1),
+                                  title='page')
+    assert dict(meta)['title'] == 'page'
+    site_meta.author = 'jekyll'
+    assert meta.author == 'jekyll'
+
+
 class TestMeta(object):
 
     def setUp(self):
@@ -75,6 +93,50 @@ Heading 2
         assert q("h1:eq(0)").text().strip() == "Heading 1"
         assert q("h1:eq(1)").text().strip() == "Heading 2"
 
+    def test_snapshot_reuses_front_matter(self):
+        import os
+        from hyde.fs import FolderScanner
+        from hyde.model import Config
+        about2 = File(TEST_SITE.child('content/about2.html'))
+        about2.write("---\ntitle: First\n---\nHi")
+        past = int(os.path.getmtime(about2.path)) - 100
+        for root, folders, files in os.walk(TEST_SITE.child('content')):
+            for name in [''] + files:
+                os.utime(os.path.join(root, name), (past, past))
+        config = dict(snapshot=True,
+                      plugins=['hyde.ext.plugins.meta.MetaPlugin'])
+        s = Site(TEST_SITE, Config(TEST_SITE, config_dict=config))
+        gen = Generator(s)
+        gen.generate_all()
+        assert s.content.resource_from_path(about2.path).meta.title == 'First'
+        s.snapshot.save()
+        assert File(TEST_SITE.child('.hyde_snapshot')).exists
+
+        # Same size and modification time: the snapshot is trusted.
+        about2.write("---\ntitle: Fakes\n---\nHi")
+        os.utime(about2.path, (past, past))
+        os.utime(about2.parent.path, (past, past))
+        read = FolderScanner.read
+        listed = []
+        def counting_read(self, path):
+            listed.append(path)
+            return read(self, path)
+        FolderScanner.read = counting_read
+        try:
+            s = Site(TEST_SITE, Config(TEST_SITE, config_dict=config))
+            s.load()
+        finally:
+            FolderScanner.read = read
+        assert not listed
+        assert s.content.resource_from_path(about2.path)
+        gen = Generator(s)
+        gen.events.begin_site()
+        assert s.content.resource_from_path(about2.path).meta.title == 'First'
+
+        os.utime(about2.path, (past + 10, past + 10))
+        gen.events.begin_site()
+        assert s.content.resource_from_path(about2.path).meta.title == 'Fakes'
+
     def test_can_load_front_matter(self):
         d = {'title': 'A nice title',
             'author': 'Lakshmi Vyas',
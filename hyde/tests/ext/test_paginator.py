@@ -127,3 +127,22 @@ class TestPaginator(object):
 
         assert File(page1).exists
         assert File(page2).exists
+
+
+    def test_generate_all_with_jobs(self):
+        self.deploy.delete()
+        gen = Generator(Site(TEST_SITE))
+        gen.generate_all(jobs=2)
+        pages = ['pages_of_one.txt', 'page2/pages_of_one.txt',
+                    'page3/pages_of_one.txt', 'page4/pages_of_one.txt',
+                    'custom_file_pattern.txt', 'custom_file_pattern-2.txt']
+        for page in pages:
+            assert File(self.deploy.child(page)).exists
+
+
+    def test_pages_are_unchanged_after_generation_with_hashes(self):
+        self.s.config.change_detection = 'hash'
+        self.gen.generate_all()
+        self.gen.generate_all()
+        for resource in self.s.content.walk_resources():
+            assert not self.gen.get_change_reason(resource), resource
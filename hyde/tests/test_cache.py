@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Use nose
+`$ pip install nose`
+`$ nosetests`
+"""
+import os
+
+from hyde.cache import SourceCache
+from hyde.fs import File
+from hyde.generator import Generator
+from hyde.model import Config
+from hyde.site import Site
+
+TEST_SITE = File(__file__).parent.child_folder('_test')
+
+class TestSourceCache(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def test_reads_once(self):
+        f = File(TEST_SITE.child('a.txt'))
+        f.write(u"A for apple")
+        cache = SourceCache()
+        assert cache.read(f) == u"A for apple"
+        assert cache.read(f) == u"A for apple"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_rereads_changed_files(self):
+        f = File(TEST_SITE.child('a.txt'))
+        f.write(u"A for apple")
+        cache = SourceCache()
+        cache.read(f)
+        f.write(u"A for avocado")
+        future = os.path.getmtime(f.path) + 10
+        os.utime(f.path, (future, future))
+        assert cache.read(f) == u"A for avocado"
+        assert cache.misses == 2
+        assert cache.size == len(u"A for avocado")
+
+    def test_evicts_least_recently_used(self):
+        files = []
+        for name in ('a', 'b', 'c'):
+            f = File(TEST_SITE.child(name + '.txt'))
+            f.write(name * 10)
+            files.append(f)
+        cache = SourceCache(budget=20)
+        (a, b, c) = files
+        cache.read(a)
+        cache.read(b)
+        cache.read(a)
+        cache.read(c)
+        assert a.path in cache.entries
+        assert b.path not in cache.entries
+        assert c.path in cache.entries
+        assert cache.size == 20
+
+    def test_generation_reads_sources_once(self):
+        TEST_SITE.parent.child_folder(
+                    'sites/test_jinja').copy_contents_to(TEST_SITE)
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "plugins": ["hyde.ext.plugins.meta.MetaPlugin"]
+        }))
+        gen = Generator(site)
+        gen.generate_all()
+        assert site.source_cache.hits
+        texts = [resource for resource in site.content.walk_resources()
+                    if resource.source_file.is_text]
+        assert site.source_cache.misses == len(texts)
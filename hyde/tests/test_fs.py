@@ -5,8 +5,9 @@ Use nose
 `$ nosetests`
 """
 
-from hyde.fs import FS, File, Folder
+from hyde.fs import BinaryClassifier, FS, File, Folder, compile_globs
 import codecs
+import fnmatch
 import os
 import shutil
 
@@ -56,6 +57,207 @@ def test_can_create_temp_file():
     f.delete()
     assert not f.exists
 
+def test_checksum():
+    import hashlib
+    text = "A for apple"
+    f = File.make_temp(text)
+    assert f.checksum() == hashlib.sha1(text).hexdigest()
+    assert f.checksum('md5') == hashlib.md5(text).hexdigest()
+    f.delete()
+    assert f.checksum() is None
+
+def test_read_bytes():
+    f = File.make_temp(u"A for \u00e4pple")
+    data = f.read_bytes()
+    assert isinstance(data, str)
+    assert data == u"A for \u00e4pple".encode('utf-8')
+    assert ''.join(f.iter_chunks(3)) == data
+    assert [len(chunk) for chunk in f.iter_chunks(5)] == [5, 5, 2]
+    with f.open_mmap() as mapped:
+        assert mapped[:5] == "A for"
+        assert mapped.find("pple") == 8
+        assert mapped.read(1) == "A"
+    f.delete()
+
+@raises(ValueError)
+def test_open_mmap_empty_file():
+    f = File.make_temp("")
+    try:
+        with f.open_mmap():
+            pass
+    finally:
+        f.delete()
+
+def test_has_binary_contents():
+    f = File.make_temp("")
+    assert not f.has_binary_contents()
+    f.write("A" * 5000)
+    assert not f.has_binary_contents()
+    f.write("A" * 5000 + "\0")
+    assert f.has_binary_contents()
+    f.delete()
+
+def test_has_binary_contents_reads_the_live_size():
+    f = File.make_temp("")
+    FS.use_stat_cache()
+    try:
+        assert f.size == 0
+        with open(f.path, 'wb') as fout:
+            fout.write("A\0")
+        assert f.size == 0
+        assert f.has_binary_contents()
+    finally:
+        FS.use_stat_cache(False)
+        f.delete()
+
+def test_write_if_changed():
+    import os
+    f = File.make_temp("A for apple")
+    past = int(os.path.getmtime(f.path)) - 100
+    os.utime(f.path, (past, past))
+    assert not f.write_if_changed(u"A for apple")
+    assert os.path.getmtime(f.path) == past
+    assert f.write_if_changed(u"B for ball")
+    assert f.read_all() == u"B for ball"
+    assert os.path.getmtime(f.path) != past
+    f.delete()
+    assert f.write_if_changed(u"C for cat")
+    assert f.read_all() == u"C for cat"
+    f.delete()
+
+
+def test_deploy_to():
+    import os
+    File.failed_strategies = set()
+    source = File.make_temp("A for apple")
+    for strategy in ('copy', 'hardlink', 'reflink',
+                        'copy_file_range', 'symlink'):
+        target = File(source.path + '.' + strategy)
+        assert source.deploy_to(target, strategy)
+        assert target.read_all() == "A for apple"
+        assert abs(os.path.getmtime(target.path) -
+                    os.path.getmtime(source.path)) < 0.001
+        assert not source.deploy_to(target, strategy)
+        if strategy == 'hardlink':
+            assert os.path.samefile(source.path, target.path)
+        if strategy == 'symlink':
+            assert os.path.islink(target.path)
+        os.remove(target.path)
+    source.delete()
+    File.failed_strategies = set()
+
+def test_deploy_to_falls_back_to_copy():
+    from mock import patch
+    File.failed_strategies = set()
+    source = File.make_temp("A for apple")
+    target = File(source.path + '.deployed')
+    with patch('os.link') as link:
+        link.side_effect = OSError(18, 'Invalid cross-device link')
+        assert source.deploy_to(target, 'hardlink')
+        assert 'hardlink' in File.failed_strategies
+    assert target.read_all() == "A for apple"
+    assert not os.path.samefile(source.path, target.path)
+    source.delete()
+    target.delete()
+    File.failed_strategies = set()
+
+def test_deploy_to_falls_back_without_links():
+    import os
+    File.failed_strategies = set()
+    source = File.make_temp("A for apple")
+    target = File(source.path + '.deployed')
+    link = os.link
+    del os.link
+    try:
+        assert source.deploy_to(target, 'hardlink')
+        assert 'hardlink' in File.failed_strategies
+    finally:
+        os.link = link
+    assert target.read_all() == "A for apple"
+    assert not os.path.samefile(source.path, target.path)
+    source.delete()
+    target.delete()
+    File.failed_strategies = set()
+
+def test_binary_classifier_remembers_results():
+    import os
+    from mock import patch
+    f = File.make_temp("A for apple")
+    classifier = BinaryClassifier()
+    with patch.object(File, 'has_binary_contents') as sniff:
+        sniff.return_value = False
+        assert not classifier.is_binary(f)
+        assert not classifier.is_binary(f)
+        assert sniff.call_count == 1
+        f.write("A\0B")
+        future = os.path.getmtime(f.path) + 10
+        os.utime(f.path, (future, future))
+        sniff.return_value = True
+        assert classifier.is_binary(f)
+        assert sniff.call_count == 2
+    f.delete()
+
+def test_binary_classifier_extension_rules():
+    from mock import patch
+    classifier = BinaryClassifier(text_extensions=['.md'],
+                                  binary_extensions=['PNG'])
+    with patch.object(File, 'has_binary_contents') as sniff:
+        assert not classifier.is_binary(File('/no/such/file.md'))
+        assert classifier.is_binary(File('/no/such/file.png'))
+        assert not sniff.called
+
+def test_stat_cache():
+    import os
+    f = File.make_temp("A for apple")
+    cache = FS.use_stat_cache()
+    try:
+        assert f.exists
+        assert f.size == 11
+        modified = f.last_modified
+        assert cache.misses == 1
+        assert cache.hits == 2
+        past = int(os.path.getmtime(f.path)) - 100
+        os.utime(f.path, (past, past))
+        assert f.last_modified == modified
+        f.write("B for ball")
+        assert f.size == 10
+        assert f.last_modified != modified
+        target = File(f.path + '.copy')
+        assert not target.exists
+        f.copy_to(target)
+        assert target.exists
+        f.delete()
+        target.delete()
+        assert not f.exists
+        assert not target.exists
+        cache.clear()
+        assert not cache.entries
+        assert cache.hits == cache.misses == 0
+    finally:
+        FS.use_stat_cache(False)
+    assert FS.stat_cache is None
+
+def test_stat_cache_sees_folder_changes():
+    import os
+    folder = Folder(File(__file__).parent.child_folder('_test_stat'))
+    f = File(folder.child('a.txt'))
+    FS.use_stat_cache()
+    try:
+        folder.make()
+        assert not f.exists
+        with open(f.path, 'w') as fout:
+            fout.write('A for apple')
+        assert not f.exists
+        folder.delete()
+        folder.make()
+        f.write('A for apple')
+        assert f.exists
+        folder.delete()
+        assert not f.exists
+    finally:
+        FS.use_stat_cache(False)
+        folder.delete()
+
 def test_time_functions():
     f1 = File(__file__)
     t1 = f1.last_modified
@@ -178,12 +380,22 @@ def test_is_descendant_of():
     assert JINJA2.is_descendant_of(TEMPLATE_ROOT)
     assert INDEX.is_descendant_of(TEMPLATE_ROOT)
     assert not INDEX.is_descendant_of(DATA_ROOT)
+    assert not JINJA2.is_descendant_of(JINJA2)
+    assert not Folder('/usr/localhost').is_descendant_of('/usr/local')
+    assert Folder('/usr/local').is_descendant_of('/')
+    assert Folder('/usr/local').is_descendant_of('/usr/')
 
 def test_get_relative_path():
     assert INDEX.get_relative_path(TEMPLATE_ROOT) == Folder(JINJA2.name).child(INDEX.name)
     assert INDEX.get_relative_path(TEMPLATE_ROOT.parent) == Folder(
                         TEMPLATE_ROOT.name).child_folder(JINJA2.name).child(INDEX.name)
     assert JINJA2.get_relative_path(JINJA2) == ""
+    assert INDEX.get_relative_path(TEMPLATE_ROOT.path + os.sep) == \
+                            INDEX.get_relative_path(TEMPLATE_ROOT)
+    assert File('/usr/local/bin').get_relative_path('/') == \
+                            os.path.join('usr', 'local', 'bin')
+    assert File('/usr/local/bin').get_relative_path('/opt') == \
+                            os.path.join('usr', 'local', 'bin')
 
 def test_get_mirror():
     mirror = JINJA2.get_mirror(DATA_ROOT, source_root=TEMPLATE_ROOT)
@@ -285,6 +497,61 @@ def test_rename_folder():
     for f in [HELPERS, INDEX, LAYOUT]:
         assert File(DATA_JUNK2.child(f.name)).exists
 
+@with_setup(setup_data, cleanup_data)
+def test_mirror_to():
+    import os
+    source = DATA_ROOT.child_folder('source')
+    mirror = DATA_ROOT.child_folder('mirror')
+    for path in ['a/b/one.html', 'a/two.html', 'three.html']:
+        target = File(source.child(path))
+        target.parent.make()
+        target.write(path)
+    changes = source.mirror_to(mirror)
+    assert changes == [('added', os.path.join('a', 'b', 'one.html')),
+                       ('added', os.path.join('a', 'two.html')),
+                       ('added', 'three.html')]
+    assert File(mirror.child('a/b/one.html')).read_all() == 'a/b/one.html'
+    assert source.mirror_to(mirror, threads=2) == []
+
+    File(source.child('three.html')).write('changed')
+    File(source.child('a/b/one.html')).delete()
+    Folder(source.child('a/b')).delete()
+    File(mirror.child('.git/HEAD')).parent.make()
+    File(mirror.child('.git/HEAD')).write('ref')
+    File(mirror.child('extra.html')).write('extra')
+    assert source.mirror_to(mirror, compare='hash') == \
+                [('updated', 'three.html')]
+    assert File(mirror.child('a/b/one.html')).exists
+
+    File(mirror.child('c/d/.git')).parent.make()
+    File(mirror.child('c/d/.git')).write('gitdir: ../..')
+    File(mirror.child('c/e/f.html')).parent.make()
+    File(mirror.child('c/e/f.html')).write('f')
+    changes = source.mirror_to(mirror, delete=True, ignore=['.git'])
+    assert changes == [('deleted', os.path.join('a', 'b')),
+                       ('deleted', os.path.join('a', 'b', 'one.html')),
+                       ('deleted', os.path.join('c', 'e')),
+                       ('deleted', os.path.join('c', 'e', 'f.html')),
+                       ('deleted', 'extra.html')]
+    assert not Folder(mirror.child('a/b')).exists
+    assert not Folder(mirror.child('c/e')).exists
+    assert File(mirror.child('c/d/.git')).exists
+    assert File(mirror.child('a/two.html')).exists
+    assert File(mirror.child('.git/HEAD')).exists
+
+    mirrored = File(mirror.child('a/two.html'))
+    past = int(os.path.getmtime(mirrored.path)) - 100
+    os.utime(mirrored.path, (past, past))
+    assert source.mirror_to(mirror, compare='size') == []
+    assert source.mirror_to(mirror) == \
+                [('updated', os.path.join('a', 'two.html'))]
+    assert abs(os.path.getmtime(mirrored.path) -
+                os.path.getmtime(source.child('a/two.html'))) < 0.001
+
+@raises(ValueError)
+def test_mirror_to_unknown_comparison():
+    JINJA2.mirror_to(DATA_ROOT, compare='ctime')
+
 @with_setup(setup_data, cleanup_data)
 def test_read_all():
     utxt = u'åßcdeƒ'
@@ -331,6 +598,50 @@ def test_walker():
     assert len(folders) == 2
     assert len(complete) == 1
 
+def test_compile_globs():
+    patterns = ['*.bak', '.git', 'media/js/*.js', '[ab]?.txt']
+    regex = compile_globs(patterns)
+    for name in ['x.bak', '.git', '.gitignore', 'media/js/a.js',
+                 'media/css/a.css', 'ab.txt', 'cd.txt', 'a.txt']:
+        assert bool(regex.match(name)) == any(
+                fnmatch.fnmatch(name, pattern) for pattern in patterns)
+    assert compile_globs([]) is None
+    assert compile_globs(patterns) is regex
+
+def test_scanner():
+    ROOT = File(__file__).parent.child_folder('_test')
+    ROOT.make()
+    try:
+        for path in ['a/b/one.html', 'a/two.html', 'a/two.html~',
+                     'c/three.html', '.git/HEAD', 'four.html']:
+            target = File(ROOT.child(path))
+            target.parent.make()
+            target.write('')
+        if hasattr(os, 'symlink'):
+            os.symlink(ROOT.child('c'), ROOT.child('linked'))
+        ignore = ['*~', '.git']
+        walked = []
+        with ROOT.walker as walker:
+            @walker.folder_visitor
+            def visit_folder(folder):
+                if any(fnmatch.fnmatch(folder.name, p) for p in ignore):
+                    return False
+                walked.append((folder.path, []))
+            @walker.file_visitor
+            def visit_file(afile):
+                if not any(fnmatch.fnmatch(afile.name, p) for p in ignore):
+                    walked[-1][1].append(afile.name)
+        scanned = ROOT.get_scanner(ignore).scan()
+        assert [path for path, _ in scanned] == [path for path, _ in walked]
+        assert [sorted(files) for _, files in scanned] == \
+                [sorted(files) for _, files in walked]
+        assert ROOT.get_scanner(ignore, threads=2).scan() == scanned
+        if hasattr(os, 'symlink'):
+            assert (ROOT.child('linked'), ['three.html']) in scanned
+        assert ROOT.get_scanner(['_test']).scan() == []
+    finally:
+        ROOT.delete()
+
 def test_walker_walk_all():
     items = list(TEMPLATE_ROOT.walker.walk_all())
     assert len(items) == 6
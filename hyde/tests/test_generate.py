@@ -90,6 +90,333 @@ class TestGenerator(object):
         l.write(l.read_all())
         assert gen.has_resource_changed(resource)
 
+    def test_has_resource_changed_ignores_truncated_mtimes(self):
+        import os
+        import time
+        site = Site(TEST_SITE)
+        site.load()
+        resource = site.content.resource_from_relative_path('about.html')
+        gen = Generator(site)
+        gen.generate_all()
+        generated = time.time() + 100
+        target = site.config.deploy_root_path.child('about.html')
+        os.utime(target, (generated, generated))
+        os.utime(resource.path, (generated + 0.0005, generated + 0.0005))
+        assert gen.get_change_reason(resource) is None
+        os.utime(resource.path, (generated + 1, generated + 1))
+        assert gen.get_change_reason(resource) == "source newer"
+
+    def test_plan(self):
+        from mock import patch
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        with patch.object(gen.events, 'site_complete') as site_complete, \
+             patch.object(gen.events, 'generation_complete') as complete:
+            plan = gen.plan()
+            assert site_complete.called
+            assert complete.called
+        assert not gen.deps.dirty
+        assert not gen.manifest.dirty
+        assert len(plan) == len(list(site.content.walk_resources()))
+        assert all(reason == 'missing target' for (_, reason) in plan)
+        gen.generate_all()
+        assert gen.plan() == []
+        import os, time
+        future = time.time() + 60
+        l = File(TEST_SITE.child('layout/root.html'))
+        os.utime(l.path, (future, future))
+        File(site.config.deploy_root_path.child('404.html')).delete()
+        plan = dict((resource.relative_path, reason)
+                        for (resource, reason) in gen.plan())
+        assert plan['about.html'] == 'dependency changed: root.html'
+        assert plan['404.html'] == 'missing target'
+
+    def test_has_resource_changed_with_hash_change_detection(self):
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "change_detection": "hash"
+        }))
+        site.load()
+        resource = site.content.resource_from_path(TEST_SITE.child('content/about.html'))
+        gen = Generator(site)
+        gen.generate_all()
+        assert gen.manifest[resource.relative_deploy_path]['source']
+        assert not gen.has_resource_changed(resource)
+        import os, time
+        future = time.time() + 60
+        os.utime(resource.source_file.path, (future, future))
+        l = File(TEST_SITE.child('layout/root.html'))
+        os.utime(l.path, (future, future))
+        assert not gen.has_resource_changed(resource)
+        text = resource.source_file.read_all()
+        resource.source_file.write(text + "\n")
+        assert gen.has_resource_changed(resource)
+        gen.generate_all()
+        assert not gen.has_resource_changed(resource)
+        l.write(l.read_all() + "\n")
+        gen.initialize()
+        assert gen.has_resource_changed(resource)
+
+    def test_generate_all_with_render_cache(self):
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "render_cache": True
+        }))
+        site.load()
+        gen = Generator(site)
+        gen.render_cache.clear()
+        gen.generate_all()
+        misses = gen.render_cache.misses
+        assert misses
+        assert not gen.render_cache.hits
+        about = File(site.config.deploy_root_path.child('about.html'))
+        text = about.read_all()
+        about.delete()
+        gen.generate_all()
+        assert gen.render_cache.hits == misses
+        assert about.read_all() == text
+        l = File(TEST_SITE.child('layout/root.html'))
+        l.write(l.read_all() + '<p>changed</p>')
+        gen.generate_all()
+        assert gen.render_cache.misses > misses
+        assert '<p>changed</p>' in about.read_all()
+
+    def test_render_cache_ignores_deployment_config(self):
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "render_cache": True
+        }))
+        site.load()
+        resource = site.content.resource_from_path(TEST_SITE.child('content/about.html'))
+        gen = Generator(site)
+        gen.load_template_if_needed()
+        key = gen.get_render_key(resource)
+        site.config.deploy_root = 'www'
+        site.config.publisher = {'github': {'type': 'hyde.ext.publishers.dvcs.Git'}}
+        assert gen.get_render_key(resource) == key
+        site.config.mode = 'production'
+        assert gen.get_render_key(resource) != key
+
+    def test_generate_all_with_jobs(self):
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.deps.clear()
+        gen.generate_all(jobs=2)
+        deploy = site.config.deploy_root_path
+        for resource in site.content.walk_resources():
+            target = File(deploy.child(resource.relative_deploy_path))
+            assert target.exists
+        about = File(deploy.child('about.html'))
+        q = PyQuery(about.read_all())
+        assert about.name in q("div#main").text()
+        assert 'about.html' in gen.deps
+        assert 'base.html' in gen.deps['about.html']
+
+    def test_generate_all_with_writers(self):
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.writer.threads = 2
+        gen.generate_all(jobs=2)
+        gen.generate_all()
+        assert not gen.writer.pending
+        assert not gen.writer.workers
+        deploy = site.config.deploy_root_path
+        for resource in site.content.walk_resources():
+            target = File(deploy.child(resource.relative_deploy_path))
+            assert target.exists
+        assert 'about.html' not in gen.changed_outputs
+        layout = File(TEST_SITE.child('layout/root.html'))
+        layout.write(layout.read_all() + "<p>changed</p>")
+        gen.generate_all()
+        assert 'about.html' in gen.changed_outputs
+        about = File(deploy.child('about.html'))
+        assert 'changed' in about.read_all()
+        assert not gen.writer.workers
+
+    def test_generate_with_stat_cache(self):
+        import os
+        site = Site(TEST_SITE, Config(TEST_SITE,
+                        config_dict=dict(stat_cache=True)))
+        site.load()
+        gen = Generator(site)
+        try:
+            gen.generate_all(incremental=True)
+            assert FS.stat_cache.hits
+            about = File(site.config.deploy_root_path.child('about.html'))
+            assert about.exists
+            layout = TEST_SITE.child('layout/root.html')
+            with open(layout, 'a') as fout:
+                fout.write("<p>changed</p>")
+            future = int(os.path.getmtime(about.path)) + 100
+            os.utime(layout, (future, future))
+            gen.generate_all(incremental=True)
+            assert 'about.html' in gen.changed_outputs
+            assert 'changed' in about.read_all()
+        finally:
+            FS.use_stat_cache(False)
+
+    def test_generate_all_writes_only_changed_outputs(self):
+        import os
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.generate_all()
+        about = File(site.config.deploy_root_path.child('about.html'))
+        assert 'about.html' in gen.changed_outputs
+        past = int(os.path.getmtime(about.path)) - 100
+        os.utime(about.path, (past, past))
+        gen.generate_all()
+        assert 'about.html' not in gen.changed_outputs
+        assert os.path.getmtime(about.path) == past
+        layout = File(TEST_SITE.child('layout/root.html'))
+        layout.write(layout.read_all() + "<p>changed</p>")
+        gen.generate_all()
+        assert 'about.html' in gen.changed_outputs
+        assert os.path.getmtime(about.path) != past
+
+    def test_unchanged_outputs_are_verified_only_when_needed(self):
+        import os
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.generate_all()
+        gen.manifest.save()
+        gen.generate_all(incremental=True)
+        assert not gen.manifest.dirty
+        about = site.content.resource_from_relative_path('about.html')
+        past = int(os.path.getmtime(about.path)) - 1000
+        target = site.config.deploy_root_path.child('about.html')
+        os.utime(target, (past, past))
+        gen.generate_all(incremental=True)
+        assert 'about.html' not in gen.changed_outputs
+        assert gen.manifest.changed == set(['about.html'])
+        assert gen.get_change_reason(about) is None
+        gen.manifest.save()
+        gen.generate_all(incremental=True)
+        assert not gen.manifest.dirty
+
+    def test_sources_edited_while_rendering_are_not_verified(self):
+        import os
+        import time
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.generate_all()
+        about = site.content.resource_from_relative_path('about.html')
+        past = int(os.path.getmtime(about.path)) - 1000
+        target = site.config.deploy_root_path.child('about.html')
+        os.utime(target, (past, past))
+        render = gen.__render_resource__
+        def edit_while_rendering(resource, context):
+            text = render(resource, context)
+            if resource == about:
+                time.sleep(0.01)
+                about.source_file.write(about.source_file.read_all())
+            return text
+        gen.__render_resource__ = edit_while_rendering
+        gen.generate_all(incremental=True)
+        assert gen.get_change_reason(about) == "source newer"
+
+    def test_generate_all_prunes_stale_outputs(self):
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.generate_all()
+        deploy = site.config.deploy_root_path
+        about = File(deploy.child('about.html'))
+        christmas = File(deploy.child(
+                        'blog/2010/december/merry-christmas.html'))
+        unknown = File(deploy.child('unknown.html'))
+        unknown.write("Not generated by hyde")
+        assert 'about.html' in gen.outputs
+        gen.outputs[deploy.child('404.html')] = '404.html'
+        gen.outputs.save()
+        assert about.exists
+        assert christmas.exists
+        source = File(TEST_SITE.child('content/about.html'))
+        source.copy_to(File(TEST_SITE.child('content/about-us.html')))
+        source.delete()
+        File(TEST_SITE.child(
+            'content/blog/2010/december/merry-christmas.html')).delete()
+
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.generate_all(incremental=True)
+        assert not about.exists
+        assert File(deploy.child('about-us.html')).exists
+        assert not christmas.exists
+        assert not christmas.parent.exists
+        assert unknown.exists
+        assert gen.removed_outputs == set(['about.html',
+                    'blog/2010/december/merry-christmas.html'])
+        assert File(deploy.child('404.html')).exists
+        assert 'about-us.html' in gen.outputs
+        assert 'about.html' not in gen.outputs
+        assert deploy.child('404.html') not in gen.outputs
+
+    def test_generator_classifies_files_by_configured_extensions(self):
+        from hyde.model import FileTypes
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "file_types": {"text": [".html"], "binary": ["css"]}
+        }))
+        site.load()
+        gen = Generator(site)
+        assert isinstance(site.classifier.entries, FileTypes)
+        assert File.classifier is not site.classifier
+        about = site.content.resource_from_relative_path('about.html')
+        css = site.content.resource_from_relative_path('media/css/site.css')
+        assert about.is_text
+        assert css.is_binary
+        assert not css.source_file.is_binary
+        assert not site.classifier.entries
+        gen.generate_all()
+        assert File(site.config.deploy_root_path.child(
+                        'media/css/site.css')).read_all() == \
+                    css.source_file.read_all()
+
+    def test_binary_deploy_strategy(self):
+        import os
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "deploy_strategy": "hardlink"
+        }))
+        site.load()
+        gen = Generator(site)
+        gen.generate_all()
+        icon = site.content.resource_from_relative_path('favicon.ico')
+        target = site.config.deploy_root_path.child('favicon.ico')
+        assert os.path.samefile(icon.path, target)
+        site.config.plugins = ['hyde.ext.plugins.optipng.OptiPNGPlugin']
+        from hyde.plugin import Plugin
+        Plugin.load_all(site)
+        assert gen.get_binary_deploy_strategy() == 'copy'
+
+    def test_generate_only(self):
+        site = Site(TEST_SITE)
+        site.load()
+        gen = Generator(site)
+        gen.generate_all()
+        deploy = site.config.deploy_root_path
+        about = File(deploy.child('about.html'))
+        christmas = File(deploy.child(
+                        'blog/2010/december/merry-christmas.html'))
+        robots = File(deploy.child('robots.txt'))
+        for target in (about, christmas, robots):
+            target.delete()
+        resources = gen.generate_only(['about.html'])
+        assert [r.relative_path for r in resources] == ['about.html']
+        assert about.exists
+        assert not christmas.exists
+        assert not robots.exists
+        resources = gen.generate_only(['layout/root.html'])
+        paths = [r.relative_path for r in resources]
+        assert 'about.html' in paths
+        assert 'blog/2010/december/merry-christmas.html' in paths
+        assert christmas.exists
+        assert not robots.exists
+        gen.generate_only(['blog/**'])
+        assert not robots.exists
+
     def test_context(self):
         site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
             "context": {
@@ -375,6 +375,49 @@ class TestJinjaTemplate(object):
         assert 'layout.html' in deps
         assert 'index.html' in deps
 
+    def test_depends_are_memoized_until_the_template_changes(self):
+        site = Site(TEST_SITE)
+        JINJA2.copy_contents_to(site.content.source)
+        inc = File(TEST_SITE.child('content/inc.md'))
+        inc.write("{% extends 'index.html' %}")
+        site.load()
+        gen = Generator(site)
+        gen.load_template_if_needed()
+        t = gen.template
+        deps = list(t.get_dependencies('inc.md'))
+        assert len(deps) == 3
+        assert 'inc.md' in t.dependencies
+        assert 'index.html' in t.dependencies
+        assert sorted(t.get_dependencies('inc.md')) == sorted(deps)
+
+        import os
+        inc.write("{% include 'helpers.html' %}")
+        mtime = os.path.getmtime(inc.path) + 10
+        os.utime(inc.path, (mtime, mtime))
+        deps = list(t.get_dependencies('inc.md'))
+        assert deps == ['helpers.html']
+
+    def test_depends_see_changes_in_nested_templates(self):
+        import os
+        site = Site(TEST_SITE)
+        JINJA2.copy_contents_to(site.content.source)
+        inc = File(TEST_SITE.child('content/inc.md'))
+        inc.write("{% include 'partial.html' %}")
+        partial = File(TEST_SITE.child('content/partial.html'))
+        partial.write("partial")
+        File(TEST_SITE.child('content/new.html')).write("new")
+        site.load()
+        gen = Generator(site)
+        gen.load_template_if_needed()
+        t = gen.template
+        assert sorted(t.get_dependencies('inc.md')) == ['partial.html']
+
+        partial.write("{% include 'new.html' %}")
+        mtime = os.path.getmtime(partial.path) + 10
+        os.utime(partial.path, (mtime, mtime))
+        assert sorted(t.get_dependencies('inc.md')) == \
+                    ['new.html', 'partial.html']
+
     def test_line_statements_with_blocks(self):
         site = Site(TEST_SITE)
         JINJA2.copy_contents_to(site.content.source)
@@ -4,7 +4,7 @@ Use nose
 `$ pip install nose`
 `$ nosetests`
 """
-from hyde.model import Config, Expando
+from hyde.model import Config, Dependents, Expando
 from hyde.fs import *
 
 def test_expando_one_level():
@@ -157,3 +157,62 @@ class TestConfig(object):
         assert c.media_root_path == c.content_root_path.child_folder('xxx')
         assert c.media_url == TEST_SITE.child_folder('/media')
         assert c.deploy_root_path == Folder('~/deploy_site')
+
+    def test_needs_refresh_is_checked_once_until_invalidated(self):
+        import os, time
+        c = Config(sitepath=TEST_SITE)
+        assert not c.needs_refresh()
+        last_modified = c.last_modified
+        future = time.time() + 60
+        os.utime(TEST_SITE.child('site.yaml'), (future, future))
+        assert not c.needs_refresh()
+        assert c.last_modified == last_modified
+        c.invalidate()
+        assert c.needs_refresh()
+        assert c.last_modified > last_modified
+
+
+class TestDependents(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def test_dependencies_are_transitive(self):
+        d = Dependents(TEST_SITE)
+        d['index.html'] = ['base.j2']
+        d['base.j2'] = ['macros.j2']
+        assert d.dependencies_of('index.html') == set(['base.j2', 'macros.j2'])
+        assert d.dependencies_of('macros.j2') == set()
+
+    def test_dependents_are_transitive(self):
+        d = Dependents(TEST_SITE)
+        d['index.html'] = ['base.j2', None]
+        d['about.html'] = ['base.j2']
+        d['blog/post.html'] = ['post.j2']
+        d['post.j2'] = ['base.j2']
+        assert d.dependents_of('base.j2') == set(['index.html', 'about.html',
+                                            'post.j2', 'blog/post.html'])
+        assert d.dependents_of('index.html') == set()
+
+    def test_index_is_rebuilt_when_the_graph_changes(self):
+        d = Dependents(TEST_SITE)
+        d['index.html'] = ['base.j2']
+        assert d.dependents_of('base.j2') == set(['index.html'])
+        d['about.html'] = ['base.j2']
+        assert d.dependents_of('base.j2') == set(['index.html', 'about.html'])
+        del d['index.html']
+        assert d.dependents_of('base.j2') == set(['about.html'])
+        d.update({'index.html': ['base.j2']})
+        assert d.dependents_of('base.j2') == set(['index.html', 'about.html'])
+        d.clear()
+        assert d.dependents_of('base.j2') == set()
+
+    def test_cycles_terminate(self):
+        d = Dependents(TEST_SITE)
+        d['a'] = ['b']
+        d['b'] = ['a']
+        assert d.dependencies_of('a') == set(['b'])
+        assert d.dependents_of('a') == set(['b'])
@@ -369,4 +369,36 @@ class TestPlugins(object):
                 assert len(mock1_args) == 1
                 assert len(mock2_args) == 1
                 assert mock1_args == ["site.css"]
-                assert mock2_args == ["merry-christmas.html"]
\ No newline at end of file
+                assert mock2_args == ["merry-christmas.html"]
+
+    def test_proxy_calls_only_overriding_plugins(self):
+        self.site.config.plugins = [
+            'hyde.tests.test_plugin.PluginLoaderStub',
+            'hyde.tests.test_plugin.ConstantReturnPlugin'
+        ]
+        gen = Generator(self.site)
+        (stub, constant) = self.site.plugins
+        assert not stub.overrides('begin_text_resource')
+        assert constant.overrides('begin_text_resource')
+        dispatch = gen.events.get_dispatch_list('begin_text_resource')
+        assert [plugin for (plugin, _, _, _) in dispatch] == [constant]
+        dispatch = gen.events.get_dispatch_list('template_loaded')
+        assert [plugin for (plugin, _, _, _) in dispatch] == [stub, constant]
+        assert gen.events.begin_site is gen.events.begin_site
+        assert gen.events.begin_site() is None
+
+    def test_proxy_follows_reloaded_plugins(self):
+        self.site.load()
+        gen = Generator(self.site)
+        resource = self.site.content.resource_from_relative_path('about.html')
+        assert gen.events.begin_text_resource(resource, "text") is None
+        self.site.config.plugins = [
+            'hyde.tests.test_plugin.ConstantReturnPlugin'
+        ]
+        Plugin.load_all(self.site)
+        assert gen.events.begin_text_resource(resource, "text") == "Jam"
+        del self.site.plugins[:]
+        self.site.plugins_version += 1
+        assert gen.events.begin_text_resource(resource, "text") is None
+        self.site.plugins = [ConstantReturnPlugin(self.site)]
+        assert gen.events.begin_text_resource(resource, "text") == "Jam"
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Use nose
+`$ pip install nose`
+`$ nosetests`
+"""
+import json
+
+from hyde.fs import File
+from hyde.generator import Generator
+from hyde.model import Config
+from hyde.profiler import Profiler
+from hyde.site import Site
+
+TEST_SITE = File(__file__).parent.child_folder('_test')
+
+def test_disabled_profiler_does_not_measure():
+    p = Profiler()
+    with p.measure('phase', 'render'):
+        pass
+    assert not p.records
+
+def test_measure_accumulates():
+    p = Profiler(enabled=True)
+    for i in range(3):
+        with p.measure('phase', 'render'):
+            pass
+    (count, wall, cpu) = p.records[('phase', 'render')]
+    assert count == 3
+    assert wall >= 0
+
+def test_merge_and_report():
+    p = Profiler(enabled=True)
+    p.add('resource', 'a.html', 1.0, 0.5)
+    other = Profiler(enabled=True)
+    other.add('resource', 'a.html', 1.0, 0.5)
+    other.add('resource', 'b.html', 3.0, 0.1)
+    p.merge(other.records)
+    report = p.report()
+    assert [r['name'] for r in report] == ['b.html', 'a.html']
+    assert report[1]['count'] == 2
+    assert report[1]['wall'] == 2.0
+    report = p.report(sort_by='cpu')
+    assert [r['name'] for r in report] == ['a.html', 'b.html']
+    lines = p.summary(top=1)
+    assert len(lines) == 2
+    assert 'b.html' in lines[1]
+
+class TestProfiledGeneration(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+        TEST_SITE.parent.child_folder(
+                    'sites/test_jinja').copy_contents_to(TEST_SITE)
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def test_generation_is_profiled(self):
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "plugins": ["hyde.ext.plugins.meta.MetaPlugin"]
+        }))
+        gen = Generator(site)
+        gen.profiler.enabled = True
+        gen.generate_all()
+        records = gen.profiler.records
+        for phase in ('load', 'begin_site', 'generate', 'render', 'write'):
+            assert ('phase', phase) in records
+        assert ('resource', 'about.html') in records
+        assert ('plugin', 'MetaPlugin.begin_site') in records
+        report = File(TEST_SITE.child('profile.json'))
+        gen.profiler.save(report.path)
+        data = json.loads(report.read_all())
+        assert len(data['records']) == len(records)
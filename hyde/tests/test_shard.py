@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Use nose
+`$ pip install nose`
+`$ nosetests`
+"""
+from hyde.exceptions import HydeException
+from hyde.fs import File
+from hyde.generator import Generator
+from hyde.model import Config, Dependents, Manifest, Outputs
+from hyde.shard import merge_shards, parse_shard, shard_manifest, shard_of
+from hyde.site import Site
+
+from nose.tools import raises
+
+TEST_SITE = File(__file__).parent.child_folder('_test')
+
+def test_parse_shard():
+    assert parse_shard('1/4') == (1, 4)
+    assert parse_shard(' 4 / 4 ') == (4, 4)
+
+@raises(HydeException)
+def test_parse_shard_out_of_range():
+    parse_shard('5/4')
+
+@raises(HydeException)
+def test_parse_shard_invalid():
+    parse_shard('1-4')
+
+def test_shard_of_is_stable():
+    shards = [shard_of('blog/post-%d.html' % i, 4) for i in range(100)]
+    assert set(shards) == set([1, 2, 3, 4])
+    assert shards == [shard_of('blog/post-%d.html' % i, 4)
+                        for i in range(100)]
+    assert shard_of(u'blog/post-1.html', 4) == shard_of('blog/post-1.html', 4)
+
+class TestShardedGeneration(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+        TEST_SITE.parent.child_folder(
+                    'sites/test_jinja').copy_contents_to(TEST_SITE)
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def generate_shard(self, shard):
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "deploy_root": "shard%d" % shard[0]
+        }))
+        gen = Generator(site)
+        gen.generate_all(shard=shard)
+        return gen
+
+    def test_shards_generate_disjoint_slices(self):
+        generated = []
+        for index in (1, 2):
+            gen = self.generate_shard((index, 2))
+            deploy = gen.site.config.deploy_root_path
+            assert shard_manifest(deploy, (index, 2)).exists
+            assert shard_manifest(deploy, (index, 2)).parent == deploy.parent
+            for resource in gen.site.content.walk_resources():
+                target = File(deploy.child(resource.relative_deploy_path))
+                assert target.exists == (
+                        shard_of(resource.relative_path, 2) == index)
+                if target.exists:
+                    generated.append(resource.relative_path)
+        assert len(generated) == len(set(generated))
+        assert generated
+
+    def test_merge_shards(self):
+        for index in (1, 2):
+            self.generate_shard((index, 2))
+        site = Site(TEST_SITE)
+        site.load()
+        deps = Dependents(TEST_SITE)
+        manifest = Manifest(TEST_SITE)
+        outputs = Outputs(TEST_SITE)
+        outputs.clear()
+        merge_shards(site, [TEST_SITE.child('shard1'),
+                            TEST_SITE.child('shard2')], deps, manifest,
+                     outputs)
+        deploy = site.config.deploy_root_path
+        for resource in site.content.walk_resources():
+            target = deploy.child(resource.relative_deploy_path)
+            assert File(target).exists
+            assert outputs[resource.relative_deploy_path] == \
+                                                resource.relative_path
+        assert 'about.html' in deps
+        assert not [name for name in deploy.lister.list_files()
+                        if '.hyde_shard' in name.name]
+
+    def test_merge_into_a_shard_folder(self):
+        for index in (1, 2):
+            self.generate_shard((index, 2))
+        site = Site(TEST_SITE, Config(TEST_SITE, config_dict={
+            "deploy_root": "shard1"
+        }))
+        site.load()
+        merge_shards(site, [TEST_SITE.child('shard1'),
+                            TEST_SITE.child('shard2')],
+                        Dependents(TEST_SITE), Manifest(TEST_SITE))
+        deploy = site.config.deploy_root_path
+        for resource in site.content.walk_resources():
+            assert File(deploy.child(resource.relative_deploy_path)).exists
+        assert not [name for name in deploy.lister.list_files()
+                        if '.hyde_shard' in name.name]
+
+    @raises(HydeException)
+    def test_only_cannot_be_combined_with_shard(self):
+        from hyde.engine import Engine
+        e = Engine(raise_exceptions=True)
+        e.run(e.parse(['-s', unicode(TEST_SITE), 'gen',
+                        '--shard', '1/2', '--only', 'about.html']))
+
+    @raises(HydeException)
+    def test_merge_shards_fails_for_missing_shards(self):
+        self.generate_shard((1, 2))
+        site = Site(TEST_SITE)
+        merge_shards(site, [TEST_SITE.child('shard1')],
+                        Dependents(TEST_SITE), Manifest(TEST_SITE))
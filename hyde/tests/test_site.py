@@ -4,10 +4,11 @@ Use nose
 `$ pip install nose`
 `$ nosetests`
 """
+import os
 import yaml
 from urllib import quote
 
-from hyde.fs import File, Folder
+from hyde.fs import FS, File, Folder
 from hyde.model import Config, Expando
 from hyde.site import Node, RootNode, Site
 
@@ -162,6 +163,85 @@ def test_relative_deploy_path_override():
         else:
             assert page.relative_deploy_path == Folder(page.relative_path)
 
+def test_load_with_scan_threads():
+    s = Site(TEST_SITE_ROOT)
+    s.load()
+    threaded = Site(TEST_SITE_ROOT)
+    threaded.config.scan_threads = 2
+    threaded.load()
+    assert [r.relative_path for r in threaded.content.walk_resources()] == \
+            [r.relative_path for r in s.content.walk_resources()]
+    assert [n.relative_path for n in threaded.content.walk()] == \
+            [n.relative_path for n in s.content.walk()]
+
+def test_lookups_do_not_create_fs_objects():
+    s = Site(TEST_SITE_ROOT)
+    s.load()
+    path = 'blog/2010/december/merry-christmas.html'
+    content = TEST_SITE_ROOT.child_folder('content')
+    source = content.child(path)
+    layout = TEST_SITE_ROOT.child('layout/root.html')
+    created = []
+    init = FS.__init__
+    def counting_init(self, path):
+        created.append(path)
+        init(self, path)
+    FS.__init__ = counting_init
+    try:
+        resource = s.content.resource_from_relative_path(path)
+        assert resource
+        assert resource.relative_path == path.replace('/', os.sep)
+        assert s.content.resource_from_path(source) == resource
+        assert s.content.resource_from_relative_deploy_path(path) == resource
+        assert s.content.node_from_relative_path('blog/2010/') == \
+                                                    resource.node.parent
+        assert s.content.node_from_path(content.path + '/') == s.content
+        assert s.content.node_from_relative_path('') == s.content
+        assert not s.content.resource_from_path(layout)
+        assert not s.content.node_from_path(content.path + '-other/blog')
+        assert s.content.resource_from_relative_path(source) == resource
+        assert s.content.resource_from_relative_deploy_path(source) == \
+                                                    resource
+        assert s.content.node_from_relative_path(content.path) == s.content
+        assert not s.content.resource_from_relative_path(layout)
+    finally:
+        FS.__init__ = init
+    assert not created
+
+def test_resource_is_compact():
+    s = Site(TEST_SITE_ROOT)
+    s.load()
+    resource = s.content.resource_from_relative_path('about.html')
+    assert not hasattr(resource, '__dict__') or not resource.__dict__
+    assert resource.source_file == File(TEST_SITE_ROOT.child('content/about.html'))
+    assert resource.name == 'about.html'
+    assert resource.site == s
+    assert resource.source_file is resource.source_file
+    assert resource.relative_path is resource.relative_path
+    resource.tags = ['a']
+    resource.depends = []
+    resource.meta = resource.node.meta = Expando({})
+    assert not resource.__dict__ and not resource.node.__dict__
+    resource.rating = 5
+    assert resource.__dict__ == dict(rating=5)
+
+def test_register_attribute():
+    from hyde.site import Resource
+    s = Site(TEST_SITE_ROOT)
+    s.load()
+    resource = s.content.resource_from_relative_path('about.html')
+    assert not hasattr(resource, 'prev_by_test')
+    Resource.register_attribute('prev_by_test')
+    try:
+        assert resource.prev_by_test is None
+        assert Resource.extension_attributes['prev_by_test'] is None
+        assert 'prev_by_test' not in Node.extension_attributes
+        resource.prev_by_test = resource
+        assert resource.prev_by_test == resource
+    finally:
+        del Resource.prev_by_test
+        del Resource.extension_attributes['prev_by_test']
+
 class TestSiteWithConfig(object):
 
     @classmethod
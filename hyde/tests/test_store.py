@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Use nose
+`$ pip install nose`
+`$ nosetests`
+"""
+from hyde.ext.stores.sqlite import SQLiteStore
+from hyde.fs import File
+from hyde.model import Dependents, Manifest, Snapshot
+from hyde.store import PickleStore, Store, YAMLStore
+
+TEST_SITE = File(__file__).parent.child_folder('_test')
+
+class TestYAMLStore(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def test_load_store(self):
+        store = Store.load_store(TEST_SITE, 'yaml', 'deps', '.hyde_deps')
+        assert isinstance(store, YAMLStore)
+        store = Store.load_store(TEST_SITE, None, 'deps', '.hyde_deps')
+        assert isinstance(store, YAMLStore)
+        store = Store.load_store(TEST_SITE,
+                    'hyde.ext.stores.sqlite.SQLiteStore', 'deps', '.hyde_deps')
+        assert isinstance(store, SQLiteStore)
+
+    def test_saves_only_when_dirty(self):
+        deps_file = File(TEST_SITE.child('.hyde_deps'))
+        d = Dependents(TEST_SITE)
+        d.save()
+        assert not deps_file.exists
+        d['index.html'] = ['base.j2']
+        assert d.dirty
+        d.save()
+        assert not d.dirty
+        assert deps_file.exists
+        deps_file.write('sentinel: []')
+        d.save()
+        assert deps_file.read_all() == 'sentinel: []'
+
+    def test_only_unsaved_stores_are_kept_for_exit(self):
+        from hyde.model import UNSAVED_STORES, save_unsaved_stores
+        # Forget the stores of the other tests, which may use this path.
+        UNSAVED_STORES.clear()
+        d = Dependents(TEST_SITE)
+        assert id(d) not in UNSAVED_STORES
+        d['index.html'] = ['base.j2']
+        assert UNSAVED_STORES[id(d)] is d
+        save_unsaved_stores()
+        assert id(d) not in UNSAVED_STORES
+        assert Dependents(TEST_SITE)['index.html'] == ['base.j2']
+
+    def test_round_trip(self):
+        d = Dependents(TEST_SITE)
+        d['index.html'] = ['base.j2']
+        d['about.html'] = ['base.j2']
+        d.save()
+        d = Dependents(TEST_SITE)
+        assert d['index.html'] == ['base.j2']
+        assert d.dependents_of('base.j2') == set(['index.html', 'about.html'])
+
+
+class TestSQLiteStore(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def test_round_trip(self):
+        d = Dependents(TEST_SITE, store='sqlite')
+        d['index.html'] = ['base.j2']
+        d['about.html'] = ['base.j2']
+        d.save()
+        assert File(TEST_SITE.child('.hyde_store.sqlite')).exists
+        assert not File(TEST_SITE.child('.hyde_deps')).exists
+        d = Dependents(TEST_SITE, store='sqlite')
+        assert d['index.html'] == ['base.j2']
+        assert d.dependents_of('base.j2') == set(['index.html', 'about.html'])
+
+    def test_namespaces_are_separate(self):
+        d = Dependents(TEST_SITE, store='sqlite')
+        d['index.html'] = ['base.j2']
+        d.save()
+        m = Manifest(TEST_SITE, store='sqlite')
+        assert not m
+        m['index.html'] = dict(source='abc')
+        m.save()
+        assert Manifest(TEST_SITE, store='sqlite')['index.html'] == \
+                                                    dict(source='abc')
+        assert 'index.html' in Dependents(TEST_SITE, store='sqlite')
+
+    def test_writes_only_changes(self):
+        first = Dependents(TEST_SITE, store='sqlite')
+        second = Dependents(TEST_SITE, store='sqlite')
+        first['index.html'] = ['base.j2']
+        second['about.html'] = ['base.j2']
+        first.save()
+        second.save()
+        d = Dependents(TEST_SITE, store='sqlite')
+        assert d['index.html'] == ['base.j2']
+        assert d['about.html'] == ['base.j2']
+
+    def test_removes_deleted_entries(self):
+        d = Dependents(TEST_SITE, store='sqlite')
+        d['index.html'] = ['base.j2']
+        d['about.html'] = ['base.j2']
+        d.save()
+        del d['index.html']
+        d.save()
+        d = Dependents(TEST_SITE, store='sqlite')
+        assert 'index.html' not in d
+        assert 'about.html' in d
+        d.clear()
+        d.save()
+        assert not Dependents(TEST_SITE, store='sqlite')
+
+
+class TestPickleStore(object):
+
+    def setUp(self):
+        TEST_SITE.make()
+
+    def tearDown(self):
+        TEST_SITE.delete()
+
+    def test_round_trip(self):
+        d = Dependents(TEST_SITE, store='pickle')
+        d['index.html'] = ['base.j2']
+        d.save()
+        assert File(TEST_SITE.child('.hyde_deps')).exists
+        assert Dependents(TEST_SITE, store='pickle')['index.html'] == \
+                                                            ['base.j2']
+
+    def test_ignores_unreadable_file(self):
+        File(TEST_SITE.child('.hyde_snapshot')).write('not a pickle')
+        store = Store.load_store(TEST_SITE, 'pickle',
+                                    'snapshot', '.hyde_snapshot')
+        assert isinstance(store, PickleStore)
+        assert store.load() == {}
+
+    def test_snapshot(self):
+        import os
+        folder = TEST_SITE.child_folder('content')
+        folder.make()
+        past = int(os.path.getmtime(folder.path)) - 100
+        os.utime(folder.path, (past, past))
+        reads = []
+        def read():
+            reads.append(True)
+            return (['blog'], ['index.html'])
+        snapshot = Snapshot(TEST_SITE)
+        assert snapshot.listing(folder.path, read) == (['blog'], ['index.html'])
+        assert snapshot.listing(folder.path, read) == (['blog'], ['index.html'])
+        assert len(reads) == 1
+        snapshot.save()
+        snapshot = Snapshot(TEST_SITE)
+        snapshot.listing(folder.path, read)
+        assert len(reads) == 1
+        os.utime(folder.path, (past + 1, past + 1))
+        snapshot.listing(folder.path, read)
+        assert len(reads) == 2
+        snapshot.prune('listing')
+        assert snapshot.data
+        snapshot.prune('listing')
+        assert not snapshot.data
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Use nose
+`$ pip install nose`
+`$ nosetests`
+"""
+import threading
+
+from hyde.writer import OutputWriter
+
+from nose.tools import raises
+
+def test_writes_immediately_without_threads():
+    writer = OutputWriter()
+    results = []
+    writer.submit(lambda: 42, results.append)
+    assert results == [42]
+    assert not writer.workers
+
+def test_delivers_results_on_drain():
+    writer = OutputWriter(2)
+    results = []
+    threads = set()
+    def job(i):
+        threads.add(threading.current_thread().name)
+        return i
+    for i in range(20):
+        writer.submit(lambda i=i: job(i), results.append)
+    writer.drain()
+    assert sorted(results) == range(20)
+    assert threading.current_thread().name not in threads
+    assert not writer.pending
+    writer.stop()
+    assert not writer.workers
+
+def test_queue_is_bounded():
+    writer = OutputWriter(1, queue_size=2)
+    release = threading.Event()
+    writer.submit(release.wait)
+    writer.submit(release.wait)
+    writer.submit(release.wait)
+    assert writer.jobs.full()
+    release.set()
+    writer.stop()
+    assert not writer.pending
+
+@raises(ValueError)
+def test_reraises_errors_after_pending_jobs():
+    writer = OutputWriter(2)
+    results = []
+    def fail():
+        raise ValueError("write failed")
+    writer.submit(fail)
+    for i in range(5):
+        writer.submit(lambda i=i: i, results.append)
+    try:
+        writer.drain()
+    finally:
+        assert not writer.pending
+        writer.stop()
+
+def test_stop_joins_the_threads_after_a_failed_job():
+    writer = OutputWriter(2)
+    release = threading.Event()
+    def fail():
+        release.wait()
+        raise ValueError("write failed")
+    writer.submit(fail)
+    release.set()
+    try:
+        writer.stop()
+    except ValueError:
+        pass
+    else:
+        assert False, "The failure was not raised."
+    assert not writer.workers
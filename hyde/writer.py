@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Writes the outputs of a generation in the background.
+"""
+import os
+import Queue
+import sys
+import threading
+import time
+
+from hyde.util import getLoggerWithNullHandler
+logger = getLoggerWithNullHandler('hyde.engine')
+
+class OutputWriter(object):
+    """
+    Runs the file system work of a generation (creating folders, writing
+    and copying outputs, setting modes) on a pool of `threads` background
+    threads, so that rendering the next resource overlaps with writing
+    the previous ones.
+
+    At most `queue_size` (by default four per thread) jobs wait to be
+    written; `submit` blocks while the queue is full, which bounds the
+    memory held by rendered text. The callbacks of completed jobs and the
+    errors of failed jobs are delivered on the thread that calls
+    `submit`, `poll` or `drain`.
+
+    With no threads, every job runs immediately on the calling thread.
+    """
+
+    def __init__(self, threads=0, queue_size=None, profiler=None):
+        super(OutputWriter, self).__init__()
+        self.threads = threads
+        self.queue_size = queue_size
+        self.profiler = profiler
+        self.workers = []
+        self.pid = None
+        self.pending = 0
+
+    def start(self):
+        """
+        Starts the threads if they are not running in this process.
+        Threads do not survive a fork, so a forked worker process
+        starts its own.
+        """
+        if self.workers and self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self.pending = 0
+        self.jobs = Queue.Queue(self.queue_size or self.threads * 4)
+        self.completed = Queue.Queue()
+        self.workers = [threading.Thread(target=self.__work__,
+                                         name='hyde-writer-%d' % i)
+                            for i in range(self.threads)]
+        for worker in self.workers:
+            worker.daemon = True
+            worker.start()
+        logger.debug("Started [%d] output writers" % self.threads)
+
+    def stop(self):
+        """
+        Waits for the pending jobs and stops the threads.
+        """
+        if not self.workers or self.pid != os.getpid():
+            self.workers = []
+            return
+        try:
+            self.drain()
+        finally:
+            for worker in self.workers:
+                self.jobs.put(None)
+            for worker in self.workers:
+                worker.join()
+            self.workers = []
+
+    def __work__(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            (function, callback) = job
+            started = time.time()
+            try:
+                result = (function(), None)
+            except Exception:
+                result = (None, sys.exc_info())
+            self.completed.put((callback, result, time.time() - started))
+
+    def submit(self, function, callback=None):
+        """
+        Queues `function` to be called on a writer thread. Once it has
+        returned, `callback` is called with its result.
+        """
+        if not self.threads:
+            if self.profiler:
+                with self.profiler.measure('phase', 'write'):
+                    result = function()
+            else:
+                result = function()
+            if callback:
+                callback(result)
+            return
+        self.start()
+        self.jobs.put((function, callback))
+        self.pending += 1
+        self.poll()
+
+    def poll(self, block=False):
+        """
+        Delivers the results of the completed jobs. If `block` is True,
+        waits for all the pending jobs. If a job has failed, waits for
+        the others and re-raises its error.
+        """
+        failure = None
+        while self.pending:
+            try:
+                (callback, (result, error), elapsed) = \
+                            self.completed.get(block or bool(failure))
+            except Queue.Empty:
+                break
+            self.pending -= 1
+            if self.profiler and self.profiler.enabled:
+                self.profiler.add('phase', 'write', elapsed, 0.0)
+            if failure:
+                continue
+            if error:
+                failure = error
+            elif callback:
+                callback(result)
+        if failure:
+            raise failure[0], failure[1], failure[2]
+
+    def drain(self):
+        """
+        Waits for all the pending jobs and delivers their results.
+        """
+        self.poll(block=True)
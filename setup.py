@@ -127,6 +127,9 @@ setup(name=PROJECT,
           'pygments',
           'typogrify-hyde'
       ),
+      extras_require={
+        'scandir': ['scandir'],
+      },
       tests_require=(
         'nose',
       ),